@@ -8,4 +8,9 @@
 ======================================="""
 __version__ = "v1.2.0"
 
-from .core import EasyChainCli
+from .cache import LazyJSON
+from .core import STALE, EasyChainCli
+from .aio import AsyncEasyChainCli
+from .ratelimit import RateLimiter
+from .retry import RetryPolicy
+from .deadline import deadline
@@ -0,0 +1,231 @@
+# _*_ codign:utf8 _*_
+"""====================================
+@Author:Sadam·Sadik
+@Email：1903249375@qq.com
+@Date：2026/10/18
+@Software: PyCharm
+@disc: asyncio 客户端
+======================================="""
+import asyncio
+import itertools
+import json
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from typing import AsyncIterator, Callable, Iterable, Tuple, Union
+
+from FDEasyChainSDK.core import EasyChainCli
+from FDEasyChainSDK.deadline import remaining as deadline_remaining
+from FDEasyChainSDK.exceptions import EasyChainException, create_exception
+from FDEasyChainSDK.singleflight import AsyncSingleFlight
+
+try:
+    import aiohttp
+except ImportError:  # pragma: no cover - 可选依赖
+    aiohttp = None
+
+
+class _AsyncResponse:
+    """aiohttp 响应的已读取副本，提供 __parse_response__ 和异常信息用到的 requests.Response 属性"""
+
+    def __init__(self, status_code: int, content: bytes, headers, request):
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers
+        self.request = request
+
+    @property
+    def text(self) -> str:
+        return self.content.decode('utf-8', errors='replace')
+
+    def json(self):
+        return json.loads(self.content)
+
+
+class AsyncEasyChainCli(EasyChainCli):
+    """
+    asyncio 版本的客户端，需要安装 aiohttp（pip install FDEasyChainSDK[async]）
+    所有接口方法与 EasyChainCli 相同，返回协程：data, is_cached = await cli.company_basic_query(key)。
+    HTTP请求在事件循环中并发执行（连接池复用连接），缓存读写和响应解析在一个小线程池中执行，不阻塞事件循环；
+    成千上万个并发请求不需要每个请求一个线程。签名、缓存、异常与同步客户端一致。
+    """
+
+    def __init__(self, *args, max_connections: int = 100, cache_workers: int = 8, **kwargs):
+        """
+        :param max_connections: 同时保持的最大HTTP连接数，超出的请求排队等待空闲连接
+        :param cache_workers: 执行缓存读写和响应解析的线程数
+        其余参数与 EasyChainCli 相同
+        """
+        if aiohttp is None:
+            raise ImportError("使用 AsyncEasyChainCli 需要先安装: pip install aiohttp")
+        super().__init__(*args, **kwargs)
+        self.max_connections = max_connections
+        self._keep_alive = kwargs.get('keep_alive', True)
+        self._http = None
+        self._cache_executor = ThreadPoolExecutor(max_workers=cache_workers, thread_name_prefix="FDEasyChainCacheIO")
+        self._refresh_tasks = set()
+        if self._single_flight is not None:
+            self._single_flight = AsyncSingleFlight()
+
+    async def _get_http(self):
+        # ClientSession 需要在事件循环中创建，首次请求时创建
+        if self._http is None or self._http.closed:
+            connector = aiohttp.TCPConnector(limit=self.max_connections, force_close=not self._keep_alive)
+            self._http = aiohttp.ClientSession(connector=connector)
+        return self._http
+
+    async def _run_blocking(self, fn, *args):
+        """在缓存线程池中执行阻塞调用（缓存读写、响应解析）"""
+        return await asyncio.get_running_loop().run_in_executor(self._cache_executor, fn, *args)
+
+    async def __post__(self, api_path, payload: dict):
+        cache_key = self.__cache_key__(api_path, payload)
+        # 检查缓存，过期时间为 0 的接口不缓存
+        use_cache = self._ttl_policy.ttl_for(api_path) > 0
+        entry = await self._run_blocking(self._cache.lookup, cache_key, self.stale_while_revalidate) \
+            if use_cache else None
+        if entry is not None:
+            hit = self.__cache_hit__(api_path, payload, cache_key, entry)
+            if hit is not None:
+                return hit
+        return await self.__fetch__(api_path, payload, cache_key, use_cache)
+
+    async def __fetch__(self, api_path, payload: dict, cache_key: str, use_cache: bool):
+        if self._single_flight is None:
+            return await self.__request__(api_path, payload, cache_key, use_cache)
+        return await self._single_flight.do(cache_key,
+                                            lambda: self.__request__(api_path, payload, cache_key, use_cache))
+
+    async def __request__(self, api_path, payload: dict, cache_key: str, use_cache: bool):
+        """
+        调用网关接口，在缓存线程池中解析响应并写入缓存；失败时按重试策略重试
+        """
+        url = self.api_endpoint + api_path
+        http = await self._get_http()
+        started = time.monotonic()
+        attempt = 0
+        while True:
+            attempt += 1
+            if self._rate_limiter is not None and not await self._rate_limiter.acquire_async(
+                    api_path, timeout=deadline_remaining()):
+                raise create_exception(status_code=408, message=f"限速等待超过调用截止时间: {url}")
+            connect_timeout, read_timeout = self.__timeouts__(url)
+            timeout = aiohttp.ClientTimeout(total=deadline_remaining(), sock_connect=connect_timeout,
+                                            sock_read=read_timeout)
+            self.retry_policy.record_attempt()
+            try:
+                headers = self.__headers__(payload)
+                async with http.post(url, headers=headers, json=payload, timeout=timeout) as resp:
+                    content = await resp.read()
+                    request = SimpleNamespace(method='POST', url=url, body=json.dumps(payload, ensure_ascii=False),
+                                              headers={**headers, 'Content-Type': 'application/json'})
+                    response = _AsyncResponse(resp.status, content, resp.headers, request)
+                result = await self._run_blocking(self.__handle_response__, api_path, response, cache_key, use_cache)
+            except asyncio.TimeoutError as e:
+                error = create_exception(status_code=408, message=f"请求超时: {e!r}")
+                delay = self.__retry_delay__(url, attempt, started, error, 'timeout')
+            except aiohttp.ClientConnectionError as e:
+                delay = self.__retry_delay__(url, attempt, started, e, 'connection')
+            except EasyChainException as e:
+                if not self.retry_policy.is_retryable(e.error_code):
+                    raise
+                delay = self.__retry_delay__(url, attempt, started, e, str(e.error_code))
+            else:
+                self.retry_policy.record_success(attempt)
+                return result
+            await asyncio.sleep(delay)
+
+    def __schedule_refresh__(self, api_path, payload: dict, cache_key: str):
+        """
+        在事件循环中创建刷新任务；同一缓存键同时只刷新一次，待刷新任务数有上限
+        """
+        with self._refresh_lock:
+            if cache_key in self._refreshing or len(self._refreshing) >= self.refresh_queue_size:
+                return
+            self._refreshing.add(cache_key)
+        task = asyncio.get_running_loop().create_task(self.__refresh__(api_path, payload, cache_key))
+        # 事件循环只保存任务的弱引用，任务完成前由这里持有
+        self._refresh_tasks.add(task)
+        task.add_done_callback(self._refresh_tasks.discard)
+
+    async def __refresh__(self, api_path, payload: dict, cache_key: str):
+        try:
+            await self.__fetch__(api_path, payload, cache_key, use_cache=True)
+        except (EasyChainException, aiohttp.ClientError) as e:
+            logging.warning(f"(缓存刷新失败) {api_path}: {e}")
+        except Exception:
+            # 其他异常（如响应不是JSON）同样不能让刷新悄无声息地失败
+            logging.exception(f"(缓存刷新异常) {api_path}")
+        finally:
+            with self._refresh_lock:
+                self._refreshing.discard(cache_key)
+
+    async def batch(self, method: Union[str, Callable], keys: Iterable[str], workers: int = None,
+                    **kwargs) -> AsyncIterator[Tuple[str, object, bool, Exception]]:
+        """
+        并发调用同一个接口查询一批企业，按完成顺序逐个返回结果（异步生成器）：
+
+            async for key, data, is_cached, error in cli.batch('company_basic_query', keys):
+                ...
+
+        keys 按需读取，同时在途的请求数不超过 workers，不会把整批加载到内存。提前停止迭代时取消尚未完成的请求。
+        :param method: 接口方法，如 cli.company_basic_query，或方法名 'company_basic_query'
+        :param keys: 企业标识序列（可以是生成器）
+        :param workers: 同时在途的请求数，默认等于 max_connections
+        :param kwargs: 传给接口方法的其他参数，如 page_size
+        :return: (key, 结果, is_cached, 异常) 异步迭代器；请求失败时结果为 None，异常为捕获到的异常，否则异常为 None
+        """
+        if isinstance(method, str):
+            method = getattr(self, method)
+        workers = workers or self.max_connections
+        keys = iter(keys)
+        pending = {}
+
+        def submit(count: int):
+            for key in itertools.islice(keys, count):
+                # 任务创建时复制当前上下文，调用方设置的截止时间同样生效
+                pending[asyncio.ensure_future(method(key, **kwargs))] = key
+
+        submit(workers)
+        try:
+            while pending:
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    key = pending.pop(task)
+                    submit(1)
+                    try:
+                        result, is_cached = task.result()
+                    except Exception as e:
+                        yield key, None, False, e
+                    else:
+                        yield key, result, is_cached, None
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def close(self):
+        """异步客户端的HTTP连接池只能在事件循环中关闭，请使用 await cli.aclose()"""
+        raise TypeError("AsyncEasyChainCli 请使用 await cli.aclose() 关闭")
+
+    def __enter__(self):
+        raise TypeError("AsyncEasyChainCli 请使用 async with AsyncEasyChainCli() as cli:")
+
+    async def aclose(self):
+        """
+        释放客户端资源：等待进行中的刷新任务，关闭HTTP连接池、缓存线程池和缓存
+        也可以用 async with AsyncEasyChainCli() as cli: 的方式在退出时自动关闭
+        """
+        if self._refresh_tasks:
+            await asyncio.gather(*self._refresh_tasks, return_exceptions=True)
+        if self._http is not None:
+            await self._http.close()
+            self._http = None
+        await self._run_blocking(EasyChainCli.close, self)
+        self._cache_executor.shutdown(wait=True)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.aclose()
@@ -0,0 +1,26 @@
+# _*_ codign:utf8 _*_
+"""====================================
+@Author:Sadam·Sadik
+@Email：1903249375@qq.com
+@Date：2026/10/18
+@Software: PyCharm
+@disc: API响应缓存
+======================================="""
+from .base import BulkItems, CacheBackend, CacheEntry, iter_bulk_items
+from .codec import CacheDecodeError, Codec, JSONCodec, MsgpackCodec, ZlibCodec, ZstdCodec, get_codec
+from .file import APICache, migrate_flat_to_sharded
+from .index import CacheIndex
+from .keys import IndexEntry
+from .lazy import LazyJSON, parse_envelope
+from .locking import StripedFileLock
+from .memory import MemoryCache
+from .migrate import migrate_cache
+from .policy import TTLPolicy
+from .redis_backend import RedisCache
+from .server import CacheServer, RemoteCache
+from .snapshot import SnapshotCache, export_snapshot
+from .sqlite import SQLiteCache
+from .stats import CacheStats
+from .sweeper import CacheSweeper
+from .tiered import TieredCache
+from .writebehind import WriteBehindCache
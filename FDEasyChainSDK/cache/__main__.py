@@ -0,0 +1,111 @@
+# _*_ codign:utf8 _*_
+"""====================================
+@Author:Sadam·Sadik
+@Email：1903249375@qq.com
+@Date：2026/10/18
+@Software: PyCharm
+@disc: 缓存维护工具（迁移/校验/清理/导出快照）
+
+    python -m FDEasyChainSDK.cache migrate file:~/.data-crawled/FDEasyChain "sqlite:/data/cache.sqlite3?codec=zstd"
+    python -m FDEasyChainSDK.cache verify "file:~/.data-crawled/FDEasyChain?layout=sharded" --repair
+    python -m FDEasyChainSDK.cache compact sqlite:~/.data-crawled/FDEasyChain.sqlite3
+    python -m FDEasyChainSDK.cache export-snapshot file:~/.data-crawled/FDEasyChain /data/FDEasyChain.fds
+======================================="""
+import argparse
+import json
+import logging
+import os
+import time
+from urllib.parse import parse_qsl, urlsplit
+
+from .base import CacheBackend
+from .file import APICache
+from .migrate import migrate_cache
+from .policy import TTLPolicy
+from .snapshot import SnapshotCache, export_snapshot
+from .sqlite import SQLiteCache
+
+_TRUE = ('1', 'true', 'yes', 'on')
+
+
+def open_backend(spec: str, ttl_policy: TTLPolicy) -> CacheBackend:
+    """
+    按描述字符串打开缓存后端
+    file:<目录>[?layout=sharded&codec=zstd&dedup=1&index=1&lock=1]、sqlite:<路径>[?codec=...]、
+    redis://<主机>:<端口>/<库>、snapshot:<快照文件>；没有前缀时按目录打开文件缓存
+    """
+    if spec.startswith(('redis://', 'rediss://', 'unix://')):
+        from .redis_backend import RedisCache
+        return RedisCache(spec, expire_seconds=ttl_policy)
+    scheme, _, rest = spec.partition(':') if spec.startswith(('file:', 'sqlite:', 'snapshot:')) else ('file', '', spec)
+    parts = urlsplit(rest)
+    path = os.path.expanduser(parts.path)
+    options = dict(parse_qsl(parts.query))
+    codec = options.get('codec', 'json')
+    if scheme == 'sqlite':
+        return SQLiteCache(expire_seconds=ttl_policy, db_path=path, codec=codec)
+    if scheme == 'snapshot':
+        return SnapshotCache(path, expire_seconds=ttl_policy)
+    return APICache(expire_seconds=ttl_policy, codec=codec, cache_dir=path, layout=options.get('layout', 'flat'),
+                    dedup=options.get('dedup', '').lower() in _TRUE, index=options.get('index', '').lower() in _TRUE,
+                    lock=options.get('lock', '').lower() in _TRUE)
+
+
+def main(argv=None):
+    """python -m FDEasyChainSDK.cache"""
+    parser = argparse.ArgumentParser(prog='python -m FDEasyChainSDK.cache', description="FDEasyChain 缓存维护工具")
+    parser.add_argument('--expire-seconds', type=int, default=30 * 24 * 3600, help="缓存过期时间（秒）")
+    parser.add_argument('--stale-grace', type=int, default=0, help="过期后继续保留的时间（秒）")
+    parser.add_argument('--ttl-policy', default=None,
+                        help="按接口路径配置的过期时间（JSON），如 '{\"/company_news_query/\": 86400}'")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    migrate = commands.add_parser('migrate', help="把有效条目迁移到另一个缓存（存储方式/目录布局/编码方式）")
+    migrate.add_argument('source', help="源缓存，如 file:~/.data-crawled/FDEasyChain")
+    migrate.add_argument('target', help="目标缓存，如 sqlite:/data/cache.sqlite3?codec=zstd")
+    migrate.add_argument('--workers', type=int, default=os.cpu_count() or 4, help="并行写入的线程数")
+    migrate.add_argument('--batch-size', type=int, default=500, help="每批写入的条目数")
+
+    verify = commands.add_parser('verify', help="校验缓存条目（可解析、未过期、缓存键一致）")
+    verify.add_argument('cache', help="要校验的缓存")
+    verify.add_argument('--repair', action='store_true', help="删除损坏、过期、缓存键不一致的条目")
+    verify.add_argument('--workers', type=int, default=os.cpu_count() or 4, help="并行读取的线程数")
+
+    compact = commands.add_parser('compact', help="删除过期条目并执行容量淘汰")
+    compact.add_argument('cache', help="要清理的缓存")
+
+    snapshot = commands.add_parser('export-snapshot', help="导出只读快照文件")
+    snapshot.add_argument('cache', help="要导出的缓存")
+    snapshot.add_argument('path', help="快照文件路径")
+    snapshot.add_argument('--codec', default='json', help="快照中缓存值的编码方式")
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+    policy = TTLPolicy(default=args.expire_seconds, stale_grace=args.stale_grace,
+                       per_path=json.loads(args.ttl_policy) if args.ttl_policy else None)
+
+    started = time.perf_counter()
+    backends = [open_backend(args.cache if args.command != 'migrate' else args.source, policy)]
+    try:
+        if args.command == 'migrate':
+            backends.append(open_backend(args.target, policy))
+            result = migrate_cache(backends[0], backends[1], workers=args.workers, batch_size=args.batch_size)
+        elif args.command == 'verify':
+            result = backends[0].verify(repair=args.repair, workers=args.workers)
+        elif args.command == 'compact':
+            result = backends[0].compact()
+        else:
+            result = {'exported': export_snapshot(backends[0], args.path, codec=args.codec)}
+    finally:
+        for backend in backends:
+            backend.close()
+    elapsed = time.perf_counter() - started
+    result.setdefault('seconds', round(elapsed, 3))
+    count = result.get('read', result.get('checked', result.get('exported')))
+    if count is not None and elapsed > 0:
+        result.setdefault('entries_per_second', round(count / elapsed))
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,227 @@
+# _*_ codign:utf8 _*_
+"""====================================
+@Author:Sadam·Sadik
+@Email：1903249375@qq.com
+@Date：2026/10/18
+@Software: PyCharm
+@disc: 缓存后端接口
+======================================="""
+import time
+from abc import ABC, abstractmethod
+from collections import namedtuple
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple, Union
+
+from .keys import IndexEntry, endpoint_of, hash_key, index_fields, normalize_path
+from .policy import TTLPolicy
+from .stats import CacheStats
+
+# 遍历缓存时返回的条目；旧格式的文件缓存没有保存原始缓存键，此时 key 为 None
+CacheEntry = namedtuple('CacheEntry', ['key', 'key_hash', 'timestamp', 'value'])
+# 批量写入的条目：{缓存键: 值}，或 (缓存键, 值) / (缓存键, 值, 写入时间) 序列
+BulkItems = Union[Mapping[str, Any], Iterable[tuple]]
+# verify() 返回的统计项
+VERIFY_FIELDS = ('checked', 'valid', 'expired', 'mismatched', 'corrupt', 'removed', 'reclaimed_bytes')
+
+
+def iter_bulk_items(items: BulkItems, timestamp: float = None) -> Iterator[Tuple[str, Any, Optional[float]]]:
+    """把批量写入的条目统一展开为 (缓存键, 值, 写入时间)，条目自带的写入时间优先"""
+    if isinstance(items, Mapping):
+        items = items.items()
+    for item in items:
+        if len(item) == 3:
+            yield item
+        else:
+            yield item[0], item[1], timestamp
+
+
+class CacheBackend(ABC):
+    """
+    缓存后端接口
+    所有后端按 "{api_path}:{normalized_body}" 形式的缓存键存取，并根据键中的接口路径应用 TTLPolicy。
+    子类至少实现 lookup/set/delete/iterate/compact；批量读写默认逐条调用，能一次往返完成的后端应当重写。
+    """
+    # 读取时是否以 LazyJSON 返回基于JSON编码的值（不解析），见 codec.decode()
+    lazy_values = False
+    # 只读后端（如缓存快照）忽略写入，TieredCache 不把它当作保存全部条目的主层级
+    read_only = False
+
+    def __init__(self, expire_seconds: Union[int, TTLPolicy] = 30 * 24 * 3600):  # 默认30天
+        self.ttl_policy = TTLPolicy.coerce(expire_seconds)
+        self._stats = CacheStats()
+
+    @property
+    def expire_seconds(self) -> int:
+        """默认过期时间（秒）"""
+        return self.ttl_policy.default
+
+    @expire_seconds.setter
+    def expire_seconds(self, value: int):
+        self.ttl_policy.default = value
+
+    def get(self, key: str) -> Any:
+        entry = self.lookup(key)
+        return entry[0] if entry else None
+
+    @abstractmethod
+    def lookup(self, key: str, max_stale: float = 0) -> Optional[Tuple[Any, float]]:
+        """
+        读取缓存条目
+        :param max_stale: 允许返回已过期多久（秒）以内的条目，调用方根据时间戳自行判断是否陈旧
+        :return: (value, timestamp)，未命中或已过期时返回 None
+        """
+
+    @abstractmethod
+    def set(self, key: str, value: Any, timestamp: float = None):
+        """
+        写入缓存条目
+        :param timestamp: 条目的写入时间，默认当前时间；迁移或提升条目时沿用原始时间
+        """
+
+    def set_by_hash(self, key_hash: str, value: Any, timestamp: float = None):
+        """
+        按缓存键的哈希写入条目，用于迁移旧格式的缓存（没有保存原始缓存键，只有 key_hash）
+        这类条目仍可以按缓存键查找，但不进入二级索引，过期时间按最长保留期判断
+        :raise NotImplementedError: 按缓存键哈希寻址之外的后端（如 Redis、内存）无法保存这类条目
+        """
+        raise NotImplementedError(f"{type(self).__name__} 不支持按缓存键哈希写入")
+
+    def bulk_set_by_hash(self, items: Iterable[Tuple[str, Any, Optional[float]]]):
+        """
+        批量按缓存键哈希写入
+        :param items: (key_hash, 值, 写入时间) 序列
+        """
+        for key_hash, value, timestamp in items:
+            self.set_by_hash(key_hash, value, timestamp=timestamp)
+
+    @abstractmethod
+    def delete(self, key: str):
+        """删除缓存条目"""
+
+    def bulk_get(self, keys: Iterable[str], max_stale: float = 0) -> Dict[str, Tuple[Any, float]]:
+        """
+        批量读取
+        :return: {缓存键: (value, timestamp)}，只包含命中的键
+        """
+        result = {}
+        for key in keys:
+            entry = self.lookup(key, max_stale=max_stale)
+            if entry is not None:
+                result[key] = entry
+        return result
+
+    def bulk_set(self, items: BulkItems, timestamp: float = None):
+        """
+        批量写入
+        :param items: {缓存键: 值}，或 (缓存键, 值) / (缓存键, 值, 写入时间) 序列
+        :param timestamp: 条目未自带写入时间时使用的写入时间，默认当前时间
+        """
+        for key, value, item_timestamp in iter_bulk_items(items, timestamp):
+            self.set(key, value, timestamp=item_timestamp)
+
+    @abstractmethod
+    def iterate(self, include_expired: bool = False) -> Iterator[CacheEntry]:
+        """流式遍历所有缓存条目，不会一次性加载到内存"""
+
+    @abstractmethod
+    def compact(self) -> dict:
+        """
+        批量清理过期条目并执行容量淘汰
+        :return: 清理结果统计
+        """
+
+    def list_entries(self, subject: str = None, subject_prefix: str = None, api_path: str = None,
+                     include_expired: bool = False) -> Iterator[IndexEntry]:
+        """
+        按企业标识/接口路径列出未过期的缓存条目
+        默认实现遍历全部缓存条目，维护了二级索引的后端应当重写
+        :param subject: 企业标识（请求体中的 key），精确匹配
+        :param subject_prefix: 企业标识前缀
+        :param api_path: 接口路径
+        :param include_expired: 是否包括已过期、尚未清理的条目
+        """
+        endpoint = normalize_path(api_path) if api_path else None
+        for entry in self.iterate(include_expired=include_expired):
+            if entry.key is None:
+                continue
+            entry_endpoint, entry_subject, page = index_fields(entry.key)
+            if _index_match(entry_endpoint, entry_subject, subject, subject_prefix, endpoint):
+                yield IndexEntry(entry_subject, entry_endpoint, page, entry.key, entry.timestamp)
+
+    def cached_dimensions(self, subject: str) -> Dict[str, List[Optional[int]]]:
+        """
+        某个企业已缓存的接口及页码
+        :return: {接口路径: [页码, ...]}，没有分页参数的接口页码为 None
+        """
+        result = {}
+        for entry in self.list_entries(subject=subject):
+            result.setdefault(entry.api_path, []).append(entry.page)
+        for pages in result.values():
+            pages.sort(key=lambda page: -1 if page is None else page)
+        return result
+
+    def invalidate(self, subject: str = None, api_path: str = None) -> int:
+        """
+        批量删除某个企业和/或某个接口的所有缓存条目（包括已过期未清理的）
+        :return: 删除的条目数
+        """
+        if subject is None and api_path is None:
+            raise ValueError("subject 和 api_path 至少指定一个")
+        keys = [entry.key for entry in self.list_entries(subject=subject, api_path=api_path,
+                                                                  include_expired=True)]
+        for key in keys:
+            self.delete(key)
+        return len(keys)
+
+    def verify(self, repair: bool = False, workers: int = 1) -> dict:
+        """
+        校验所有缓存条目：缓存值可以解码、缓存键与条目哈希一致、未超过保留期
+        默认实现基于 iterate（无法解码的条目已被 iterate 跳过，不计入 corrupt），能读取原始数据的后端应当重写
+        :param repair: 是否删除校验失败的条目
+        :param workers: 并行校验的线程数，不支持并行的后端忽略
+        :return: {'checked', 'valid', 'expired', 'mismatched', 'corrupt', 'removed', 'reclaimed_bytes'}
+        """
+        result = dict.fromkeys(VERIFY_FIELDS, 0)
+        now = time.time()
+        for entry in self.iterate(include_expired=True):
+            result['checked'] += 1
+            if entry.key is not None and hash_key(entry.key) != entry.key_hash:
+                # 只能按缓存键删除，哈希不一致的条目无法定位，只统计
+                result['mismatched'] += 1
+            elif self._is_expired(entry.key, entry.timestamp, now):
+                result['expired'] += 1
+                if repair and entry.key is not None:
+                    self.delete(entry.key)
+                    result['removed'] += 1
+            else:
+                result['valid'] += 1
+        return result
+
+    def stats(self) -> dict:
+        """读写统计快照"""
+        return self._stats.snapshot()
+
+    def reset_stats(self):
+        self._stats.reset()
+
+    def close(self):
+        """释放后端占用的资源"""
+        pass
+
+    def _is_expired(self, key: Optional[str], timestamp: float, now: float) -> bool:
+        """条目是否已超过保留期；没有原始缓存键的条目按最长保留期判断"""
+        if key is None:
+            retention = self.ttl_policy.max_ttl + self.ttl_policy.stale_grace
+        else:
+            retention = self.ttl_policy.retention_for(endpoint_of(key))
+        return now - timestamp >= retention
+
+
+def _index_match(endpoint: str, subject: Optional[str], want_subject: Optional[str],
+                 subject_prefix: Optional[str], want_endpoint: Optional[str]) -> bool:
+    if want_endpoint is not None and endpoint != want_endpoint:
+        return False
+    if want_subject is not None and subject != want_subject:
+        return False
+    if subject_prefix is not None and (subject is None or not subject.startswith(subject_prefix)):
+        return False
+    return True
@@ -0,0 +1,179 @@
+# _*_ codign:utf8 _*_
+"""====================================
+@Author:Sadam·Sadik
+@Email：1903249375@qq.com
+@Date：2026/10/18
+@Software: PyCharm
+@disc: 缓存值的序列化/压缩编码
+======================================="""
+import json
+import zlib
+from typing import Any, Dict, Optional, Union
+
+from .lazy import LazyJSON, dump_json
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - 可选依赖
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - 可选依赖
+    zstandard = None
+
+
+class CacheDecodeError(ValueError):
+    """缓存值无法解码（数据损坏或缺少对应的编码器）"""
+    pass
+
+
+def _dumps_json(value: Any) -> bytes:
+    # LazyJSON 的原始字节直接写入，不再序列化
+    return dump_json(value)
+
+
+class Codec:
+    """
+    缓存编码器基类
+    编码结果的第一个字节为编码器标记(tag)，解码时据此自动选择编码器，
+    因此不同编码器写入的缓存条目可以混合存在于同一个缓存中。
+    """
+    name = None
+    tag = None
+
+    def encode(self, value: Any) -> bytes:
+        return self.tag + self.dumps(value)
+
+    def dumps(self, value: Any) -> bytes:
+        raise NotImplementedError
+
+    def loads(self, data: bytes) -> Any:
+        raise NotImplementedError
+
+    def loads_raw(self, data: bytes) -> Optional[bytes]:
+        """还原出JSON原始字节（不解析），不是基于JSON的编码器返回 None"""
+        return None
+
+
+class JSONCodec(Codec):
+    """紧凑JSON（无缩进、不转义中文）"""
+    name = 'json'
+    tag = b'J'
+
+    def dumps(self, value: Any) -> bytes:
+        return _dumps_json(value)
+
+    def loads(self, data: bytes) -> Any:
+        return json.loads(data)
+
+    def loads_raw(self, data: bytes) -> Optional[bytes]:
+        return data
+
+
+class ZlibCodec(Codec):
+    """zlib压缩的紧凑JSON"""
+    name = 'zlib'
+    tag = b'Z'
+
+    def __init__(self, level: int = 6):
+        self.level = level
+
+    def dumps(self, value: Any) -> bytes:
+        return zlib.compress(_dumps_json(value), self.level)
+
+    def loads(self, data: bytes) -> Any:
+        return json.loads(zlib.decompress(data))
+
+    def loads_raw(self, data: bytes) -> Optional[bytes]:
+        return zlib.decompress(data)
+
+
+class MsgpackCodec(Codec):
+    """msgpack二进制编码，需要安装 msgpack"""
+    name = 'msgpack'
+    tag = b'M'
+
+    def __init__(self):
+        if msgpack is None:
+            raise ImportError("使用 msgpack 编码需要先安装: pip install msgpack")
+
+    def dumps(self, value: Any) -> bytes:
+        if isinstance(value, LazyJSON):
+            value = value.value
+        return msgpack.packb(value, use_bin_type=True)
+
+    def loads(self, data: bytes) -> Any:
+        return msgpack.unpackb(data, raw=False)
+
+
+class ZstdCodec(Codec):
+    """zstd压缩的紧凑JSON，需要安装 zstandard"""
+    name = 'zstd'
+    tag = b'S'
+
+    def __init__(self, level: int = 3):
+        if zstandard is None:
+            raise ImportError("使用 zstd 编码需要先安装: pip install zstandard")
+        self._compressor = zstandard.ZstdCompressor(level=level)
+        self._decompressor = zstandard.ZstdDecompressor()
+
+    def dumps(self, value: Any) -> bytes:
+        return self._compressor.compress(_dumps_json(value))
+
+    def loads(self, data: bytes) -> Any:
+        return json.loads(self._decompressor.decompress(data))
+
+    def loads_raw(self, data: bytes) -> Optional[bytes]:
+        return self._decompressor.decompress(data)
+
+
+CODECS = {codec.name: codec for codec in (JSONCodec, ZlibCodec, MsgpackCodec, ZstdCodec)}
+_CODECS_BY_TAG: Dict[bytes, Codec] = {}
+
+
+def get_codec(codec: Union[str, Codec]) -> Codec:
+    """
+    根据名称获取编码器实例
+    :param codec: 编码器名称('json'/'zlib'/'msgpack'/'zstd') 或 Codec 实例
+    """
+    if isinstance(codec, Codec):
+        return codec
+    if codec not in CODECS:
+        raise ValueError(f"不支持的缓存编码: {codec}")
+    return CODECS[codec]()
+
+
+def decode(data: Union[bytes, str], lazy: bool = False) -> Any:
+    """
+    解码缓存值，根据首字节的标记自动选择编码器
+    旧版本写入的JSON文本（以 '{' 或 '[' 开头）直接按JSON解析
+    :param lazy: 返回 LazyJSON。基于JSON的编码首次访问时才解析；msgpack 编码立即解码，raw 在首次访问时序列化
+    """
+    if isinstance(data, str):
+        return LazyJSON(data.encode('utf-8')) if lazy else json.loads(data)
+    if isinstance(data, memoryview):
+        # 快照文件的 mmap 切片：紧凑JSON按需解析时不复制
+        if lazy and data[:1] == JSONCodec.tag:
+            return LazyJSON(data[1:])
+        data = bytes(data)
+    elif not isinstance(data, bytes):
+        data = bytes(data)
+    tag = data[:1]
+    if tag in (b'{', b'['):
+        return LazyJSON(data) if lazy else json.loads(data)
+    codec = _CODECS_BY_TAG.get(tag)
+    if codec is None:
+        codec_cls = next((c for c in CODECS.values() if c.tag == tag), None)
+        if codec_cls is None:
+            raise CacheDecodeError(f"未知的缓存编码标记: {tag!r}")
+        codec = _CODECS_BY_TAG.setdefault(tag, codec_cls())
+    try:
+        if lazy:
+            raw = codec.loads_raw(data[1:])
+            if raw is not None:
+                return LazyJSON(raw)
+            return LazyJSON(value=codec.loads(data[1:]))
+        return codec.loads(data[1:])
+    except Exception as e:
+        raise CacheDecodeError(f"缓存值解码失败({codec.name}): {e}") from e
@@ -0,0 +1,793 @@
+# _*_ codign:utf8 _*_
+"""====================================
+@Author:Sadam·Sadik
+@Email：1903249375@qq.com
+@Date：2024/12/11
+@Software: PyCharm
+@disc: 基于文件的缓存（每个请求一个文件）
+======================================="""
+import hashlib
+import heapq
+import itertools
+import json
+import logging
+import os
+import struct
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from pathlib import Path
+from typing import Any, Callable, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+from .base import VERIFY_FIELDS, CacheBackend, CacheEntry
+from .codec import CacheDecodeError, Codec, decode, get_codec
+from .index import CacheIndex
+from .keys import IndexEntry, endpoint_of, hash_key
+from .lazy import LazyJSON
+from .locking import StripedFileLock
+from .policy import TTLPolicy
+
+# 缓存文件格式: MAGIC + 写入时间(double) + 缓存键长度(uint32) + 缓存键 + 编码后的值
+# 旧版本的缓存文件是带缩进的JSON（{"timestamp": ..., "value": ...}），读取时自动兼容；
+# 从旧格式迁移的条目没有缓存键，缓存键长度为0
+FILE_MAGIC = b'FDC1'
+_HEADER = struct.Struct('<4sdI')
+CACHE_SUFFIX = '.json'
+# 写入时先写临时文件再 rename，异常退出残留的临时文件超过1小时后由 compact 清理
+TEMP_SUFFIX = '.tmp'
+TEMP_FILE_MAX_AGE = 3600
+# 超出容量上限时淘汰到上限的90%，避免每次写入都触发淘汰
+EVICT_LOW_WATERMARK = 0.9
+DEFAULT_CACHE_DIR = Path.home() / '.data-crawled' / 'FDEasyChain'
+LAYOUTS = ('flat', 'sharded')
+# 去重存储：相同内容的缓存值只在 blobs/ 下保存一份（按 sha256 命名），缓存文件中只保存引用。
+# 每个引用对应 blob 的一个硬链接（<digest>.<key_hash>.ref），blob 的链接数减一即引用计数，
+# 硬链接不占用额外的数据块。“检查链接数后删除 blob”与“建立新链接”不是原子的，
+# 两者总是在按摘要分段的锁（线程锁 + flock）内进行，与是否启用 lock 无关
+BLOB_DIR = 'blobs'
+BLOB_SUFFIX = '.blob'
+REF_SUFFIX = '.ref'
+BLOB_REF = b'@'
+_DIGEST_LEN = 64
+INDEX_FILE = 'index.sqlite3'
+# 重建索引时每批写入的条目数
+INDEX_BATCH_SIZE = 1000
+# 并行校验时每批分发的文件数，遍历目录与读取文件交替进行，内存中最多保留一批文件
+VERIFY_CHUNK_SIZE = 1000
+
+
+def shard_path(cache_dir: Path, key_hash: str) -> Path:
+    """两级分片目录：ab/cd/abcd....json"""
+    return cache_dir / key_hash[:2] / key_hash[2:4] / f"{key_hash}{CACHE_SUFFIX}"
+
+
+def migrate_flat_to_sharded(cache_dir: Union[str, Path] = None) -> int:
+    """
+    把平铺布局的缓存目录一次性迁移为两级分片布局
+    只移动文件（同一文件系统内 rename），可以中断后重新执行
+    :param cache_dir: 缓存目录，默认 ~/.data-crawled/FDEasyChain
+    :return: 迁移的文件数
+    """
+    cache_dir = Path(cache_dir) if cache_dir else DEFAULT_CACHE_DIR
+    moved = 0
+    with os.scandir(cache_dir) as it:
+        for entry in it:
+            if not (entry.name.endswith(CACHE_SUFFIX) and entry.is_file()):
+                continue
+            target = shard_path(cache_dir, entry.name[:-len(CACHE_SUFFIX)])
+            target.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(entry.path, target)
+            moved += 1
+            if moved % 100000 == 0:
+                logging.info(f"(缓存迁移) 已迁移 {moved} 个文件")
+    return moved
+
+
+def pack_entry(key: Optional[str], timestamp: float, blob: bytes) -> bytes:
+    """打包缓存文件内容，blob 为 Codec.encode 的结果；key 为 None 表示没有缓存键"""
+    key_bytes = key.encode('utf-8') if key else b''
+    return _HEADER.pack(FILE_MAGIC, timestamp, len(key_bytes)) + key_bytes + blob
+
+
+def unpack_entry(data: bytes, load_blob: Callable[[str], bytes] = None,
+                 lazy: bool = False) -> Tuple[Optional[str], float, Any]:
+    """
+    解析缓存文件内容
+    :param load_blob: 按摘要读取去重存储中的缓存值，缓存文件中保存的是引用时使用
+    :param lazy: 值以 LazyJSON 返回，见 decode()
+    :return: (缓存键, 写入时间, 值)，旧格式（及从旧格式迁移）的缓存文件没有保存缓存键，返回 None
+    """
+    if not data.startswith(FILE_MAGIC):
+        cache_data = json.loads(data)
+        value = cache_data['value']
+        return None, cache_data['timestamp'], LazyJSON(value=value) if lazy else value
+    _, timestamp, key_len = _HEADER.unpack_from(data)
+    offset = _HEADER.size + key_len
+    key = data[_HEADER.size:offset].decode('utf-8') or None
+    blob = data[offset:]
+    if blob.startswith(BLOB_REF):
+        if load_blob is None:
+            raise CacheDecodeError("缓存值保存在去重存储中，需要提供 load_blob")
+        blob = load_blob(blob[1:].decode('ascii'))
+    return key, timestamp, decode(blob, lazy=lazy)
+
+
+class _FileSig(NamedTuple):
+    """淘汰候选文件的元数据，只保留 _discard_quietly 判断文件是否已被重写所需的字段"""
+    st_ino: int
+    st_mtime_ns: int
+    st_size: int
+
+
+class _EvictionCandidates:
+    """
+    遍历缓存目录时只保留最早（lru 为最久未访问）的一组文件，文件数和总字节数刚好覆盖需要淘汰的部分
+    千万级条目时不必保存所有文件的元数据再整体排序
+    """
+
+    def __init__(self, need_entries: int, need_bytes: int):
+        self.need_entries = need_entries
+        self.need_bytes = need_bytes
+        self.bytes = 0
+        # (-排序键, 路径, 元数据)，堆顶是保留的文件中最新的一个
+        self._heap = []
+
+    def push(self, order: float, path: str, sig: _FileSig):
+        heapq.heappush(self._heap, (-order, path, sig))
+        self.bytes += sig.st_size
+        # 去掉最新的文件后仍能覆盖需要淘汰的部分时丢弃它
+        while len(self._heap) > self.need_entries and self.bytes - self._heap[0][2].st_size >= self.need_bytes:
+            self.bytes -= heapq.heappop(self._heap)[2].st_size
+
+    def covers(self, over_entries: int, over_bytes: int) -> bool:
+        return len(self._heap) >= over_entries and self.bytes >= over_bytes
+
+    def oldest_first(self) -> List[Tuple[str, _FileSig]]:
+        return [(path, sig) for _, path, sig in sorted(self._heap, reverse=True)]
+
+
+class APICache(CacheBackend):
+    """
+    基于文件的缓存，每个请求一个缓存文件
+    文件的 mtime 与条目写入时间保持一致，atime 记录最近一次命中时间，
+    因此批量清理(compact)只需要 stat 文件，不必打开读取。
+    """
+
+    def __init__(self, expire_seconds: Union[int, TTLPolicy] = 30 * 24 * 3600,  # 默认30天
+                 codec: Union[str, Codec] = 'json', max_bytes: int = None, max_entries: int = None,
+                 eviction: str = 'lru', cache_dir: Union[str, Path] = None, layout: str = 'flat',
+                 lock: bool = False, dedup: bool = False, dedup_min_bytes: int = 256, index: bool = False):
+        """
+        :param expire_seconds: 缓存过期时间（秒），或按接口路径配置过期时间的 TTLPolicy
+        :param codec: 缓存值的编码方式
+        :param max_bytes: 缓存文件总字节数上限，None 表示不限制
+        :param max_entries: 缓存文件数上限，None 表示不限制
+        :param eviction: 超出上限时的淘汰策略，'lru' 最久未访问优先，'oldest' 最早写入优先
+        :param cache_dir: 缓存目录，默认 ~/.data-crawled/FDEasyChain
+        :param layout: 目录布局，'flat' 所有文件平铺在缓存目录下，'sharded' 按哈希前缀分两级子目录存放，
+                       已有的平铺缓存可以用 migrate_flat_to_sharded() 迁移
+        :param lock: 是否启用进程间咨询锁。写入本身总是原子的（临时文件 + rename），
+                     多个进程共享同一缓存目录时启用锁可以避免删除过期/损坏条目时误删其他进程刚写入的文件
+        :param dedup: 是否启用内容去重，相同的缓存值（如空结果、同一企业按不同标识查询到的相同结果）只保存一份；
+                      去重存储的引用计数总是加锁（与 lock 参数无关）
+        :param dedup_min_bytes: 编码后小于该字节数的值直接保存在缓存文件中，引用本身约65字节，小值去重没有收益
+        :param index: 是否维护二级索引（缓存目录下的 index.sqlite3），按企业标识/接口路径查询和批量失效时不必遍历目录。
+                      共享缓存目录的所有进程都需要开启；对已有缓存目录首次开启时先调用一次 rebuild_index()
+        """
+        if eviction not in ('lru', 'oldest'):
+            raise ValueError(f"不支持的淘汰策略: {eviction}")
+        if layout not in LAYOUTS:
+            raise ValueError(f"不支持的缓存目录布局: {layout}")
+        super().__init__(expire_seconds)
+        self.codec = get_codec(codec)
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.eviction = eviction
+        # 条目数/字节数的运行计数，首次 compact 之后才有值
+        self._entries = None
+        self._bytes = None
+        self._lock = threading.Lock()
+        # 后台清理线程：建立运行计数、超出容量上限时淘汰，不在写入线程中遍历缓存目录
+        self._compactor: Optional[threading.Thread] = None
+        self.layout = layout
+        # 默认在用户主目录下创建缓存目录
+        self.cache_dir = Path(cache_dir) if cache_dir else DEFAULT_CACHE_DIR
+        print("CacheDir:", self.cache_dir)
+        self.cache_dir.mkdir(exist_ok=True, parents=True)
+        locks = StripedFileLock(self.cache_dir / '.locks') if lock or dedup else None
+        self._file_lock = locks if lock else None
+        # 去重存储的引用计数总是加锁，否则回收 blob 时可能删掉其他线程/进程刚建立引用的 blob
+        self._blob_lock = locks if dedup else None
+        self.dedup = dedup
+        self.dedup_min_bytes = dedup_min_bytes
+        self.blob_dir = self.cache_dir / BLOB_DIR
+        self._index = CacheIndex(self.cache_dir / INDEX_FILE) if index else None
+
+    @property
+    def _bounded(self) -> bool:
+        return self.max_bytes is not None or self.max_entries is not None
+
+    def _get_cache_file(self, key: str) -> Path:
+        # 文件名沿用 .json 后缀，新旧格式的缓存文件共用同一路径，无需迁移
+        return self._get_cache_file_by_hash(hash_key(key))
+
+    def _get_cache_file_by_hash(self, key_hash: str) -> Path:
+        if self.layout == 'sharded':
+            return shard_path(self.cache_dir, key_hash)
+        return self.cache_dir / f"{key_hash}{CACHE_SUFFIX}"
+
+    def lookup(self, key: str, max_stale: float = 0) -> Optional[Tuple[Any, float]]:
+        cache_file = self._get_cache_file(key)
+        endpoint = endpoint_of(key)
+        started = time.perf_counter()
+        try:
+            with self._locked(cache_file, exclusive=False):
+                with cache_file.open('rb') as f:
+                    st = os.fstat(f.fileno())
+                    identity = (st.st_ino, st.st_mtime_ns)
+                    data = f.read()
+        except OSError:
+            self._stats.record(endpoint, misses=1, read_seconds=time.perf_counter() - started)
+            return None
+
+        outcome = {'misses': 1}
+        result = None
+        try:
+            _, timestamp, value = unpack_entry(data, self._load_blob, lazy=self.lazy_values)
+            age = time.time() - timestamp
+            ttl = self.ttl_policy.ttl_for(endpoint)
+            if age < ttl + max_stale:
+                if self._bounded and self.eviction == 'lru':
+                    # 记录命中时间，供LRU淘汰使用
+                    os.utime(cache_file, (time.time(), timestamp))
+                outcome = {'hits': 1, 'stale_hits': int(age >= ttl)}
+                result = value, timestamp
+            elif age >= self.ttl_policy.retention_for(endpoint):
+                # 超过保留期则删除缓存文件
+                self._discard(cache_file, identity)
+                outcome['expirations'] = 1
+        except (ValueError, KeyError, TypeError, OSError, struct.error):
+            # 如果读取出错，删除可能损坏的缓存文件
+            self._discard(cache_file, identity)
+            outcome['corrupt'] = 1
+        self._stats.record(endpoint, bytes_read=len(data), read_seconds=time.perf_counter() - started, **outcome)
+        return result
+
+    def set(self, key: str, value: Any, timestamp: float = None):
+        self._write_entry(self._get_cache_file(key), key, value, timestamp)
+
+    def set_by_hash(self, key_hash: str, value: Any, timestamp: float = None):
+        """按文件名（缓存键的MD5）写入没有缓存键的条目，写入新格式（缓存键长度为0），不进入二级索引"""
+        self._write_entry(self._get_cache_file_by_hash(key_hash), None, value, timestamp)
+
+    def _write_entry(self, cache_file: Path, key: Optional[str], value: Any, timestamp: Optional[float]):
+        key_hash = cache_file.name[:-len(CACHE_SUFFIX)]
+        started = time.perf_counter()
+        timestamp = timestamp or time.time()
+        blob = self.codec.encode(value)
+        digest, blob_bytes = None, 0
+        try:
+            if self.dedup and len(blob) >= self.dedup_min_bytes:
+                digest, blob_bytes = self._store_blob(blob, key_hash)
+                blob = BLOB_REF + digest.encode('ascii')
+            data = pack_entry(key, timestamp, blob)
+            with self._locked(cache_file):
+                old_size = self._file_size(cache_file) if self._bounded else None
+                old_digest = self._entry_ref(cache_file) if self.dedup else None
+                self._write_atomic(cache_file, data, timestamp)
+        except OSError as e:
+            # 写入失败时原文件保持不变，临时文件已清理
+            logging.error(f"(缓存写入失败) {cache_file}: {e}")
+            if digest is not None:
+                self._release_blob(digest, key_hash)
+            return
+        if old_digest is not None and old_digest != digest:
+            blob_bytes -= self._release_blob(old_digest, key_hash)
+        if self._index is not None and key is not None:
+            self._index.add(key_hash, key, timestamp)
+        self._stats.record(endpoint_of(key) if key else '', writes=1, bytes_written=len(data) + max(blob_bytes, 0),
+                           write_seconds=time.perf_counter() - started)
+        if self._bounded:
+            self._account(len(data) + blob_bytes, old_size)
+
+    @staticmethod
+    def _write_atomic(cache_file: Path, data: bytes, timestamp: float):
+        """先写同目录下的临时文件，再 rename 覆盖目标文件，其他进程只会读到完整的旧文件或新文件"""
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=cache_file.parent, prefix='.', suffix=TEMP_SUFFIX)
+        except FileNotFoundError:
+            # 分片子目录按需创建
+            cache_file.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=cache_file.parent, prefix='.', suffix=TEMP_SUFFIX)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.utime(tmp_path, (time.time(), timestamp))
+            os.replace(tmp_path, cache_file)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+
+    def delete(self, key: str):
+        self._discard(self._get_cache_file(key))
+
+    def _blob_path(self, digest: str) -> Path:
+        return self.blob_dir / digest[:2] / digest[2:4] / f"{digest}{BLOB_SUFFIX}"
+
+    def _store_blob(self, blob: bytes, key_hash: str) -> Tuple[str, int]:
+        """
+        把缓存值写入去重存储，并为 key_hash 增加一个引用
+        :return: (摘要, 新写入的字节数)，内容已存在时新写入字节数为0
+        """
+        digest = hashlib.sha256(blob).hexdigest()
+        blob_path = self._blob_path(digest)
+        ref_path = blob_path.with_name(f"{digest}.{key_hash}{REF_SUFFIX}")
+        with self._blob_lock.acquire(digest):
+            for _ in range(3):
+                written = 0
+                if not blob_path.exists():
+                    written = len(blob) if self._create_blob(blob_path, blob) else 0
+                try:
+                    os.link(blob_path, ref_path)
+                except FileExistsError:
+                    # 同一个键重复写入相同内容，引用已存在
+                    pass
+                except FileNotFoundError:
+                    # blob 刚被其他进程回收，重新写入
+                    continue
+                return digest, written
+        raise OSError(f"无法写入去重存储: {blob_path}")
+
+    @staticmethod
+    def _create_blob(blob_path: Path, blob: bytes) -> bool:
+        """写临时文件后 link 到目标路径，已存在时不覆盖（覆盖会产生新的 inode，使已有引用失效）"""
+        blob_path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=blob_path.parent, prefix='.', suffix=TEMP_SUFFIX)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(blob)
+            os.link(tmp_path, blob_path)
+            return True
+        except FileExistsError:
+            return False
+        finally:
+            os.unlink(tmp_path)
+
+    def _release_blob(self, digest: str, key_hash: str) -> int:
+        """
+        删除 key_hash 对 blob 的引用，没有其他引用时回收 blob
+        :return: 回收的字节数
+        """
+        blob_path = self._blob_path(digest)
+        with self._blob_lock.acquire(digest):
+            try:
+                os.unlink(blob_path.with_name(f"{digest}.{key_hash}{REF_SUFFIX}"))
+                st = os.stat(blob_path)
+                if st.st_nlink > 1:
+                    return 0
+                os.unlink(blob_path)
+            except OSError:
+                return 0
+        return st.st_size
+
+    def _load_blob(self, digest: str) -> bytes:
+        if len(digest) != _DIGEST_LEN:
+            raise CacheDecodeError(f"无效的去重存储引用: {digest}")
+        with self._blob_path(digest).open('rb') as f:
+            return f.read()
+
+    @staticmethod
+    def _entry_ref(path: Union[str, Path]) -> Optional[str]:
+        """读取缓存文件中的去重引用，值直接保存在文件中或文件不存在时返回 None"""
+        try:
+            with open(path, 'rb') as f:
+                header = f.read(_HEADER.size)
+                if len(header) < _HEADER.size or not header.startswith(FILE_MAGIC):
+                    return None
+                f.seek(_HEADER.unpack(header)[2], os.SEEK_CUR)
+                ref = f.read(1 + _DIGEST_LEN)
+        except OSError:
+            return None
+        if len(ref) != 1 + _DIGEST_LEN or not ref.startswith(BLOB_REF):
+            return None
+        return ref[1:].decode('ascii', errors='replace')
+
+    def _locked(self, path: Union[str, Path], exclusive: bool = True):
+        return self._locked_hash(os.path.basename(path)[:-len(CACHE_SUFFIX)], exclusive=exclusive)
+
+    def _locked_hash(self, key_hash: str, exclusive: bool = True):
+        if self._file_lock is None:
+            return nullcontext()
+        return self._file_lock.acquire(key_hash, exclusive=exclusive)
+
+    @staticmethod
+    def _file_size(path: Path) -> Optional[int]:
+        try:
+            return path.stat().st_size
+        except OSError:
+            return None
+
+    def _discard(self, path: Union[str, Path], identity: Tuple[int, int] = None) -> Optional[int]:
+        """
+        删除缓存文件
+        :param identity: 读取时的 (inode, mtime_ns)，文件已被其他进程重写时不删除
+        :return: 删除的文件大小，未删除时返回 None
+        """
+        with self._locked(path):
+            try:
+                st = os.stat(path)
+                if identity is not None and (st.st_ino, st.st_mtime_ns) != identity:
+                    return None
+                digest = self._entry_ref(path) if self.dedup else None
+                os.unlink(path)
+            except OSError:
+                return None
+        size = st.st_size
+        key_hash = os.path.basename(path)[:-len(CACHE_SUFFIX)]
+        if digest is not None:
+            size += self._release_blob(digest, key_hash)
+        if self._index is not None:
+            self._index.remove([key_hash])
+        if self._bounded:
+            with self._lock:
+                if self._entries is not None:
+                    self._entries -= 1
+                    self._bytes -= size
+        return size
+
+    def _account(self, size: int, old_size: Optional[int]):
+        """
+        更新运行计数，超出容量上限时在后台清理
+        运行计数尚未建立时（进程内首次写入）由后台线程遍历缓存目录建立，期间的写入不计数，
+        千万级文件的缓存目录遍历需要数分钟，不能放在请求线程中
+        """
+        with self._lock:
+            if self._entries is None:
+                need_compact = True
+            else:
+                self._entries += 0 if old_size is not None else 1
+                self._bytes += size - (old_size or 0)
+                need_compact = self._over_budget()
+            if need_compact and self._compactor is None:
+                self._compactor = threading.Thread(target=self._compact_in_background, name="FDEasyChainCacheCompact",
+                                                   daemon=True)
+                self._compactor.start()
+
+    def _compact_in_background(self):
+        try:
+            self.compact()
+        except Exception as e:
+            logging.error(f"(缓存清理失败) {self.cache_dir}: {e}")
+        finally:
+            with self._lock:
+                self._compactor = None
+
+    def _over_budget(self) -> bool:
+        return ((self.max_entries is not None and self._entries > self.max_entries)
+                or (self.max_bytes is not None and self._bytes > self.max_bytes))
+
+    def _iter_files(self, include_temp: bool = False) -> Iterator[os.DirEntry]:
+        """遍历所有缓存文件"""
+        depth = 2 if self.layout == 'sharded' else 0
+        suffixes = (CACHE_SUFFIX, TEMP_SUFFIX) if include_temp else (CACHE_SUFFIX,)
+        yield from self._scan(self.cache_dir, depth, suffixes)
+
+    def _scan(self, directory: Path, depth: int, suffixes: Tuple[str, ...]) -> Iterator[os.DirEntry]:
+        with os.scandir(directory) as it:
+            for entry in it:
+                if depth > 0:
+                    if len(entry.name) == 2 and entry.is_dir():
+                        yield from self._scan(entry.path, depth - 1, suffixes)
+                elif entry.name.endswith(suffixes) and entry.is_file():
+                    yield entry
+
+    def _ttl_for_file(self, path: str) -> int:
+        """读取文件头中的缓存键，返回该条目所属接口的保留时间；旧格式文件没有缓存键，按最长保留时间处理"""
+        with open(path, 'rb') as f:
+            header = f.read(_HEADER.size)
+            if len(header) < _HEADER.size or not header.startswith(FILE_MAGIC):
+                return self.ttl_policy.max_ttl + self.ttl_policy.stale_grace
+            key_len = _HEADER.unpack(header)[2]
+            if not key_len:
+                return self.ttl_policy.max_ttl + self.ttl_policy.stale_grace
+            key = f.read(key_len).decode('utf-8', errors='replace')
+        return self.ttl_policy.retention_for(endpoint_of(key))
+
+    def _discard_quietly(self, path: str, st: Union[os.stat_result, _FileSig]) -> Optional[int]:
+        """
+        compact 使用的删除：不更新运行计数（由 compact 统一重算），文件已被重写时跳过
+        :return: 释放的字节数（包括随之回收的 blob），未删除时返回 None
+        """
+        with self._locked(path):
+            try:
+                current = os.stat(path)
+                if (current.st_ino, current.st_mtime_ns) != (st.st_ino, st.st_mtime_ns):
+                    return None
+                digest = self._entry_ref(path) if self.dedup else None
+                os.unlink(path)
+            except OSError:
+                return None
+        if digest is None:
+            return st.st_size
+        return st.st_size + self._release_blob(digest, os.path.basename(path)[:-len(CACHE_SUFFIX)])
+
+    def _sweep_blobs(self, now: float) -> Tuple[int, int]:
+        """
+        清理去重存储：删除对应缓存文件已不存在的引用（进程异常退出时残留）和没有引用的 blob
+        :return: (回收的字节数, 剩余 blob 的总字节数)
+        """
+        reclaimed = remaining = 0
+        if not self.blob_dir.exists():
+            return reclaimed, remaining
+        blobs = []
+        for entry in self._scan(self.blob_dir, 2, (BLOB_SUFFIX, REF_SUFFIX, TEMP_SUFFIX)):
+            try:
+                if entry.name.endswith(REF_SUFFIX):
+                    digest, key_hash = entry.name[:-len(REF_SUFFIX)].split('.', 1)
+                    # 引用先于缓存文件建立，最近有过链接变化的 blob 跳过，避免误删正在写入的引用
+                    if now - entry.stat().st_ctime <= TEMP_FILE_MAX_AGE:
+                        continue
+                    cache_file = self._get_cache_file_by_hash(key_hash)
+                    if not cache_file.exists() or self._entry_ref(cache_file) != digest:
+                        reclaimed += self._release_blob(digest, key_hash)
+                elif entry.name.endswith(TEMP_SUFFIX):
+                    st = entry.stat()
+                    if now - st.st_ctime > TEMP_FILE_MAX_AGE:
+                        os.unlink(entry.path)
+                else:
+                    blobs.append(entry)
+            except (OSError, ValueError):
+                continue
+        for entry in blobs:
+            digest = entry.name[:-len(BLOB_SUFFIX)]
+            with self._blob_lock.acquire(digest):
+                try:
+                    st = os.stat(entry.path)
+                    # 刚创建、尚未建立引用的 blob 不回收
+                    if st.st_nlink <= 1 and now - st.st_ctime > TEMP_FILE_MAX_AGE:
+                        os.unlink(entry.path)
+                        reclaimed += st.st_size
+                    else:
+                        remaining += st.st_size
+                except OSError:
+                    continue
+        return reclaimed, remaining
+
+    def iterate(self, include_expired: bool = False) -> Iterator[CacheEntry]:
+        """逐个读取缓存文件，损坏或读取时已被删除的文件跳过"""
+        for entry in self._iter_files():
+            try:
+                with open(entry.path, 'rb') as f:
+                    data = f.read()
+                key, timestamp, value = unpack_entry(data, self._load_blob, lazy=self.lazy_values)
+            except (ValueError, KeyError, TypeError, OSError, struct.error):
+                continue
+            if include_expired or not self._is_expired(key, timestamp, time.time()):
+                yield CacheEntry(key, entry.name[:-len(CACHE_SUFFIX)], timestamp, value)
+
+    def list_entries(self, subject: str = None, subject_prefix: str = None, api_path: str = None,
+                     include_expired: bool = False) -> Iterator[IndexEntry]:
+        """启用索引时查询索引，否则遍历缓存目录"""
+        if self._index is None:
+            yield from super().list_entries(subject, subject_prefix, api_path, include_expired)
+            return
+        now = time.time()
+        for _, entry in self._index.select(subject, subject_prefix, api_path):
+            if include_expired or now - entry.timestamp < self.ttl_policy.retention_for(entry.api_path):
+                yield entry
+
+    def invalidate(self, subject: str = None, api_path: str = None) -> int:
+        if self._index is None:
+            return super().invalidate(subject, api_path)
+        if subject is None and api_path is None:
+            raise ValueError("subject 和 api_path 至少指定一个")
+        deleted = 0
+        stale = []
+        for key_hash, _ in self._index.select(subject, None, api_path):
+            if self._discard(self._get_cache_file_by_hash(key_hash)) is not None:
+                deleted += 1
+            else:
+                # 文件已被其他方式删除，只需清理索引
+                stale.append(key_hash)
+        self._index.remove(stale)
+        return deleted
+
+    def rebuild_index(self) -> int:
+        """
+        遍历缓存目录重建索引，用于对已有缓存首次开启索引，或有未开启索引的进程写入过缓存之后
+        旧格式（及从旧格式迁移）的缓存文件没有保存缓存键，无法建立索引
+        :return: 索引的条目数
+        """
+        if self._index is None:
+            raise RuntimeError("未启用索引（index=False）")
+        self._index.clear()
+        indexed = 0
+        batch = []
+        for entry in self._iter_files():
+            try:
+                with open(entry.path, 'rb') as f:
+                    header = f.read(_HEADER.size)
+                    if len(header) < _HEADER.size or not header.startswith(FILE_MAGIC):
+                        continue
+                    _, timestamp, key_len = _HEADER.unpack(header)
+                    key = f.read(key_len).decode('utf-8')
+            except (OSError, UnicodeDecodeError, struct.error):
+                continue
+            if not key:
+                continue
+            batch.append((entry.name[:-len(CACHE_SUFFIX)], key, timestamp))
+            if len(batch) >= INDEX_BATCH_SIZE:
+                self._index.add_many(batch)
+                indexed += len(batch)
+                batch = []
+        self._index.add_many(batch)
+        return indexed + len(batch)
+
+    def verify(self, repair: bool = False, workers: int = 1) -> dict:
+        """
+        逐个读取并解码缓存文件校验，多线程并行读取；按批遍历目录，不会一次性加载全部文件列表
+        无法解析（含引用的 blob 缺失）、文件名与缓存键的MD5不一致、已超过保留期的文件校验失败
+        :param repair: 是否删除校验失败的文件
+        :param workers: 并行读取的线程数
+        """
+        result = dict.fromkeys(VERIFY_FIELDS, 0)
+        now = time.time()
+        removed = []
+        files = self._iter_files()
+        with ThreadPoolExecutor(max_workers=max(workers, 1), thread_name_prefix='FDEasyChainVerify') as executor:
+            while True:
+                chunk = list(itertools.islice(files, VERIFY_CHUNK_SIZE))
+                if not chunk:
+                    break
+                for checked in executor.map(lambda entry: self._verify_file(entry, now, repair), chunk):
+                    if checked is None:
+                        continue
+                    key_hash, status, freed = checked
+                    result['checked'] += 1
+                    result[status] += 1
+                    if freed is not None:
+                        result['removed'] += 1
+                        result['reclaimed_bytes'] += freed
+                        removed.append(key_hash)
+        if self._index is not None:
+            self._index.remove(removed)
+        if removed and self._bounded:
+            with self._lock:
+                if self._entries is not None:
+                    self._entries -= result['removed']
+                    self._bytes -= result['reclaimed_bytes']
+        return result
+
+    def _verify_file(self, entry: os.DirEntry, now: float, repair: bool) -> Optional[Tuple[str, str, Optional[int]]]:
+        """:return: (key_hash, 校验结果, 删除释放的字节数)，文件在校验期间被删除时返回 None"""
+        try:
+            st = entry.stat()
+            with open(entry.path, 'rb') as f:
+                data = f.read()
+        except OSError:
+            return None
+        key_hash = entry.name[:-len(CACHE_SUFFIX)]
+        try:
+            key, timestamp, _ = unpack_entry(data, self._load_blob)
+        except (ValueError, KeyError, TypeError, OSError, struct.error):
+            status = 'corrupt'
+        else:
+            if key is not None and hash_key(key) != key_hash:
+                status = 'mismatched'
+            elif self._is_expired(key, timestamp, now):
+                status = 'expired'
+            else:
+                status = 'valid'
+        freed = self._discard_quietly(entry.path, st) if repair and status != 'valid' else None
+        return key_hash, status, freed
+
+    def close(self):
+        compactor = self._compactor
+        if compactor is not None:
+            compactor.join()
+        for locks in {self._file_lock, self._blob_lock} - {None}:
+            locks.close()
+        if self._index is not None:
+            self._index.close()
+
+    def compact(self) -> dict:
+        """
+        批量清理：按 mtime 删除所有过期的缓存文件，并把缓存淘汰到容量上限以内
+        :return: 清理结果统计
+        """
+        now = time.time()
+        # 只看 mtime 就能确定的过期/未过期范围；介于两者之间的文件需要读取文件头中的缓存键确定接口路径
+        expire_before = now - self.ttl_policy.max_ttl - self.ttl_policy.stale_grace
+        fresh_after = now - self.ttl_policy.min_ttl - self.ttl_policy.stale_grace
+        expired = evicted = reclaimed = 0
+        entries = total_bytes = 0
+        # 按运行计数预估需要淘汰的部分，遍历时只保留这么多候选文件；计数尚未建立时为空，遍历后再收集
+        with self._lock:
+            known = (self._entries, self._bytes) if self._entries is not None else (0, 0)
+        candidates = _EvictionCandidates(*self._overflow(*known)) if self._bounded else None
+        # 删除的缓存文件最后统一从索引中移除
+        removed = []
+        for entry in self._iter_files(include_temp=True):
+            try:
+                st = entry.stat()
+                if entry.name.endswith(TEMP_SUFFIX):
+                    # 写入过程中异常退出残留的临时文件
+                    if now - st.st_ctime > TEMP_FILE_MAX_AGE:
+                        os.unlink(entry.path)
+                        reclaimed += st.st_size
+                    continue
+                if st.st_mtime < expire_before or (
+                        st.st_mtime < fresh_after
+                        and now - st.st_mtime >= self._ttl_for_file(entry.path)):
+                    freed = self._discard_quietly(entry.path, st)
+                    if freed is not None:
+                        expired += 1
+                        reclaimed += freed
+                        removed.append(entry.name[:-len(CACHE_SUFFIX)])
+                    continue
+            except OSError:
+                continue
+            entries += 1
+            total_bytes += st.st_size
+            if candidates is not None:
+                candidates.push(self._eviction_order(st), entry.path, _FileSig(st.st_ino, st.st_mtime_ns, st.st_size))
+
+        if self.dedup:
+            blob_reclaimed, blob_bytes = self._sweep_blobs(now)
+            reclaimed += blob_reclaimed
+            total_bytes += blob_bytes
+
+        if candidates is not None:
+            over_entries, over_bytes = self._overflow(entries, total_bytes)
+            if over_entries > 0 or over_bytes > 0:
+                if not candidates.covers(over_entries, over_bytes):
+                    # 预估偏小（如首次遍历），按实际超出的部分重新收集候选文件
+                    candidates = self._collect_candidates(over_entries, over_bytes)
+                freed_entries = freed_bytes = 0
+                for path, sig in candidates.oldest_first():
+                    if freed_entries >= over_entries and freed_bytes >= over_bytes:
+                        break
+                    freed = self._discard_quietly(path, sig)
+                    if freed is None:
+                        continue
+                    freed_entries += 1
+                    freed_bytes += freed
+                    removed.append(os.path.basename(path)[:-len(CACHE_SUFFIX)])
+                evicted = freed_entries
+                reclaimed += freed_bytes
+                entries -= freed_entries
+                total_bytes -= freed_bytes
+
+        if self._index is not None:
+            self._index.remove(removed)
+        with self._lock:
+            self._entries = entries
+            self._bytes = total_bytes
+        return {'expired': expired, 'evicted': evicted, 'reclaimed_bytes': reclaimed,
+                'entries': entries, 'bytes': total_bytes}
+
+    def _overflow(self, entries: int, total_bytes: int) -> Tuple[int, int]:
+        """超出容量上限时需要淘汰的 (文件数, 字节数)，淘汰到上限的 EVICT_LOW_WATERMARK"""
+        over_entries = entries - int(self.max_entries * EVICT_LOW_WATERMARK) \
+            if self.max_entries is not None and entries > self.max_entries else 0
+        over_bytes = total_bytes - int(self.max_bytes * EVICT_LOW_WATERMARK) \
+            if self.max_bytes is not None and total_bytes > self.max_bytes else 0
+        return over_entries, over_bytes
+
+    def _eviction_order(self, st: os.stat_result) -> float:
+        return st.st_atime if self.eviction == 'lru' else st.st_mtime
+
+    def _collect_candidates(self, over_entries: int, over_bytes: int) -> _EvictionCandidates:
+        candidates = _EvictionCandidates(over_entries, over_bytes)
+        for entry in self._iter_files():
+            try:
+                st = entry.stat()
+            except OSError:
+                continue
+            candidates.push(self._eviction_order(st), entry.path, _FileSig(st.st_ino, st.st_mtime_ns, st.st_size))
+        return candidates
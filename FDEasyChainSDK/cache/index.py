@@ -0,0 +1,112 @@
+# _*_ codign:utf8 _*_
+"""====================================
+@Author:Sadam·Sadik
+@Email：1903249375@qq.com
+@Date：2026/10/18
+@Software: PyCharm
+@disc: 文件缓存的二级索引（企业标识/接口路径/页码 -> 缓存文件）
+======================================="""
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple, Union
+
+from .keys import IndexEntry, index_fields, normalize_path
+
+
+def index_where(subject: Optional[str], subject_prefix: Optional[str], api_path: Optional[str]) -> Tuple[str, tuple]:
+    """按企业标识/前缀/接口路径查询的 WHERE 子句，表中需有 subject、endpoint 列"""
+    clauses, params = [], []
+    if subject is not None:
+        clauses.append("subject = ?")
+        params.append(subject)
+    if subject_prefix:
+        # 前缀查询转换为范围查询，可以使用索引
+        clauses.append("subject >= ? AND subject < ?")
+        params += [subject_prefix, subject_prefix[:-1] + chr(ord(subject_prefix[-1]) + 1)]
+    elif subject_prefix is not None:
+        clauses.append("subject IS NOT NULL")
+    if api_path:
+        clauses.append("endpoint = ?")
+        params.append(normalize_path(api_path))
+    return ' AND '.join(clauses) or '1', tuple(params)
+
+
+class CacheIndex:
+    """
+    保存在缓存目录下的SQLite索引（index.sqlite3）
+    文件名是缓存键的MD5，无法反查；索引记录每个缓存文件对应的企业标识、接口路径和页码，
+    按企业查询/批量失效时只需一次索引查询，不必遍历目录。多个进程共享同一缓存目录时由SQLite串行化写入。
+    """
+
+    def __init__(self, db_path: Union[str, Path]):
+        self.db_path = Path(db_path)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), timeout=30, check_same_thread=False,
+                                     isolation_level=None)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache_index ("
+                " key_hash TEXT PRIMARY KEY,"
+                " subject TEXT,"
+                " endpoint TEXT NOT NULL,"
+                " page INTEGER,"
+                " cache_key TEXT NOT NULL,"
+                " created_at REAL NOT NULL"
+                ") WITHOUT ROWID"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_index_subject ON cache_index(subject, endpoint)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_index_endpoint ON cache_index(endpoint)")
+
+    def add(self, key_hash: str, key: str, timestamp: float):
+        self.add_many([(key_hash, key, timestamp)])
+
+    def add_many(self, items: Iterable[Tuple[str, str, float]]):
+        """:param items: (key_hash, 缓存键, 写入时间) 序列"""
+        rows = [(key_hash, *self._fields(key), key, timestamp) for key_hash, key, timestamp in items]
+        if not rows:
+            return
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO cache_index (key_hash, subject, endpoint, page, cache_key, created_at)"
+                    " VALUES (?, ?, ?, ?, ?, ?)", rows)
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    @staticmethod
+    def _fields(key: str) -> Tuple[Optional[str], str, Optional[int]]:
+        endpoint, subject, page = index_fields(key)
+        return subject, endpoint, page
+
+    def remove(self, key_hashes: Iterable[str]):
+        rows = [(key_hash,) for key_hash in key_hashes]
+        if not rows:
+            return
+        with self._lock:
+            self._conn.executemany("DELETE FROM cache_index WHERE key_hash = ?", rows)
+
+    def select(self, subject: str = None, subject_prefix: str = None,
+               api_path: str = None) -> List[Tuple[str, IndexEntry]]:
+        """
+        :return: [(key_hash, IndexEntry)]
+        """
+        where, params = index_where(subject, subject_prefix, api_path)
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT key_hash, subject, endpoint, page, cache_key, created_at FROM cache_index WHERE {where}"
+                f" ORDER BY subject, endpoint, page", params).fetchall()
+        return [(row[0], IndexEntry(*row[1:])) for row in rows]
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM cache_index")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,54 @@
+# _*_ codign:utf8 _*_
+"""====================================
+@Author:Sadam·Sadik
+@Email：1903249375@qq.com
+@Date：2026/10/18
+@Software: PyCharm
+@disc: 缓存键相关的工具函数
+======================================="""
+import hashlib
+import json
+from collections import namedtuple
+from typing import Optional, Tuple
+
+# 二级索引的条目：企业标识(请求体中的 key)、接口路径、页码、缓存键、写入时间
+IndexEntry = namedtuple('IndexEntry', ['subject', 'api_path', 'page', 'key', 'timestamp'])
+
+
+def hash_key(key: str) -> str:
+    """
+    计算缓存键的哈希值
+    使用MD5对缓存键进行哈希，避免文件名过长或包含特殊字符
+    """
+    return hashlib.md5(key.encode()).hexdigest()
+
+
+def endpoint_of(key: str) -> str:
+    """
+    从缓存键中提取接口路径
+    缓存键的格式为 "{api_path}:{normalized_body}"
+    """
+    return key.split(':', 1)[0]
+
+
+def normalize_path(api_path: str) -> str:
+    """统一为 SDK 内部使用的 '/xxx_query/' 形式"""
+    return f"/{api_path.strip('/')}/"
+
+
+def index_fields(key: str) -> Tuple[str, Optional[str], Optional[int]]:
+    """
+    从缓存键中提取二级索引字段
+    :return: (接口路径, 企业标识, 页码)，请求体无法解析或没有对应字段时为 None
+    """
+    endpoint, _, body = key.partition(':')
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        return endpoint, None, None
+    if not isinstance(payload, dict):
+        return endpoint, None, None
+    subject = payload.get('key')
+    page = payload.get('page_index')
+    return (endpoint, subject if isinstance(subject, str) else None,
+            page if isinstance(page, int) else None)
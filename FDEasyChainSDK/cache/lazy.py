@@ -0,0 +1,149 @@
+# _*_ codign:utf8 _*_
+"""====================================
+@Author:Sadam·Sadik
+@Email：1903249375@qq.com
+@Date：2026/10/18
+@Software: PyCharm
+@disc: 按需解析的JSON值
+======================================="""
+import json
+import re
+from json.decoder import scanstring
+from typing import Any, Dict, Iterator, Tuple, Union
+
+_DECODER = json.JSONDecoder()
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+_UNSET = object()
+
+
+class LazyJSON:
+    """
+    保存原始JSON字节、首次访问时才解析的值
+    直接转发数据的场景（写入 Elasticsearch、文件等）用 raw 取原始字节即可，全程不需要解析；
+    按 dict/list 方式访问（下标、get、in、迭代、len）时解析一次并缓存解析结果。
+    """
+    __slots__ = ('_raw', '_value')
+
+    def __init__(self, raw: Union[bytes, bytearray, memoryview] = None, value: Any = _UNSET):
+        """
+        :param raw: UTF-8 编码的JSON文本；memoryview（如快照文件的 mmap 切片）直接引用，不复制
+        :param value: 已解析的值，调用方已经解析过时传入，避免重复解析；
+                      只有解析后的值时（如 msgpack 编码、旧格式的缓存条目）可以不传 raw，首次访问 raw 时再序列化
+        """
+        if raw is None and value is _UNSET:
+            raise ValueError("raw 和 value 至少指定一个")
+        self._raw = raw if raw is None or isinstance(raw, (bytes, memoryview)) else bytes(raw)
+        self._value = value
+
+    @property
+    def raw(self) -> Union[bytes, memoryview]:
+        """原始JSON字节（bytes 或 memoryview，均可直接写入文件/socket）"""
+        if self._raw is None:
+            self._raw = json.dumps(self._value, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        return self._raw
+
+    @property
+    def value(self) -> Any:
+        """解析后的值（dict/list/...），只解析一次"""
+        if self._value is _UNSET:
+            raw = self._raw
+            self._value = json.loads(raw if isinstance(raw, bytes) else bytes(raw))
+        return self._value
+
+    @property
+    def parsed(self) -> bool:
+        """是否已经解析过"""
+        return self._value is not _UNSET
+
+    def get(self, key, default=None):
+        return self.value.get(key, default)
+
+    def keys(self):
+        return self.value.keys()
+
+    def values(self):
+        return self.value.values()
+
+    def items(self):
+        return self.value.items()
+
+    def __getitem__(self, item):
+        return self.value[item]
+
+    def __contains__(self, item) -> bool:
+        return item in self.value
+
+    def __iter__(self) -> Iterator:
+        return iter(self.value)
+
+    def __len__(self) -> int:
+        return len(self.value)
+
+    def __bool__(self) -> bool:
+        return bool(self.value)
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, LazyJSON):
+            return (self._raw is not None and self._raw == other._raw) or self.value == other.value
+        return self.value == other
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        if self.parsed:
+            return f"LazyJSON({self._value!r})"
+        return f"LazyJSON(<{len(self.raw)} bytes>)"
+
+
+def dump_json(value: Any) -> bytes:
+    """
+    值的紧凑JSON字节（不转义中文）；LazyJSON 直接取原始字节
+    结果是独立的 bytes 副本，之后调用方修改原对象或快照文件的 mmap 被关闭都不受影响
+    """
+    if isinstance(value, LazyJSON):
+        return bytes(value.raw)
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def load_json(raw: bytes, lazy: bool = False) -> Any:
+    """
+    dump_json 的逆操作，每次调用都返回新的对象，调用方之间互不影响
+    :param lazy: 返回未解析的 LazyJSON
+    """
+    return LazyJSON(raw) if lazy else json.loads(raw)
+
+
+def parse_envelope(content: Union[bytes, str]) -> Tuple[Dict[str, Any], Dict[str, bytes]]:
+    """
+    解析网关响应的外层对象，同时记录每个字段值在原文中的字节
+    与 json.loads 相同只解析一遍，但可以直接取出 data 字段的原始字节，不必再序列化一次
+    :return: (字段值, 字段原始字节)
+    """
+    text = content.decode('utf-8') if isinstance(content, (bytes, bytearray)) else content
+    fields, raw = {}, {}
+    idx = _WHITESPACE.match(text, 0).end()
+    if text[idx:idx + 1] != '{':
+        raise ValueError("响应不是JSON对象")
+    idx = _WHITESPACE.match(text, idx + 1).end()
+    if text[idx:idx + 1] == '}':
+        return fields, raw
+    try:
+        while True:
+            if text[idx:idx + 1] != '"':
+                raise ValueError(f"JSON格式错误: 位置 {idx} 处应为字段名")
+            key, idx = scanstring(text, idx + 1)
+            idx = _WHITESPACE.match(text, idx).end()
+            if text[idx:idx + 1] != ':':
+                raise ValueError(f"JSON格式错误: 位置 {idx} 处应为 ':'")
+            start = _WHITESPACE.match(text, idx + 1).end()
+            fields[key], idx = _DECODER.scan_once(text, start)
+            raw[key] = text[start:idx].encode('utf-8')
+            idx = _WHITESPACE.match(text, idx).end()
+            delimiter = text[idx:idx + 1]
+            if delimiter == '}':
+                return fields, raw
+            if delimiter != ',':
+                raise ValueError(f"JSON格式错误: 位置 {idx} 处应为 ',' 或 '}}'")
+            idx = _WHITESPACE.match(text, idx + 1).end()
+    except StopIteration as e:
+        raise ValueError(f"JSON格式错误: 位置 {e.value} 处的值无法解析") from None
@@ -0,0 +1,69 @@
+# _*_ codign:utf8 _*_
+"""====================================
+@Author:Sadam·Sadik
+@Email：1903249375@qq.com
+@Date：2026/10/18
+@Software: PyCharm
+@disc: 多进程共享缓存目录时使用的咨询锁
+======================================="""
+import logging
+import os
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Union
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+
+class StripedFileLock:
+    """
+    按缓存键哈希分段的咨询锁（flock）
+    每个缓存文件一把锁会产生海量锁文件，这里把键哈希映射到固定数量的锁文件上；
+    读取加共享锁，写入/删除加排他锁。同一进程内的线程之间再用线程锁互斥（flock 以打开的文件为单位）。
+    不支持 fcntl 的平台上退化为进程内锁。
+    """
+
+    def __init__(self, lock_dir: Union[str, Path], stripes: int = 256):
+        self.lock_dir = Path(lock_dir)
+        self.lock_dir.mkdir(parents=True, exist_ok=True)
+        self.stripes = stripes
+        self._fds: Dict[int, int] = {}
+        self._guard = threading.Lock()
+        self._thread_locks = [threading.Lock() for _ in range(stripes)]
+        if fcntl is None:
+            logging.warning("当前平台不支持 fcntl，缓存锁仅在进程内生效")
+
+    def _stripe(self, key_hash: str) -> int:
+        return int(key_hash[:8], 16) % self.stripes
+
+    def _fd(self, stripe: int) -> int:
+        with self._guard:
+            fd = self._fds.get(stripe)
+            if fd is None:
+                fd = os.open(str(self.lock_dir / f"{stripe:03d}.lock"), os.O_RDWR | os.O_CREAT, 0o644)
+                self._fds[stripe] = fd
+            return fd
+
+    @contextmanager
+    def acquire(self, key_hash: str, exclusive: bool = True):
+        stripe = self._stripe(key_hash)
+        with self._thread_locks[stripe]:
+            if fcntl is None:
+                yield
+                return
+            fd = self._fd(stripe)
+            fcntl.flock(fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+
+    def close(self):
+        with self._guard:
+            for fd in self._fds.values():
+                os.close(fd)
+            self._fds.clear()
@@ -0,0 +1,120 @@
+# _*_ codign:utf8 _*_
+"""====================================
+@Author:Sadam·Sadik
+@Email：1903249375@qq.com
+@Date：2026/10/18
+@Software: PyCharm
+@disc: 进程内的LRU内存缓存
+======================================="""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Iterator, Optional, Tuple, Union
+
+from .base import CacheBackend, CacheEntry
+from .keys import endpoint_of, hash_key
+from .lazy import dump_json, load_json
+from .policy import TTLPolicy
+
+
+class MemoryCache(CacheBackend):
+    """
+    有界的LRU内存缓存
+    同时按条目数和字节数限制容量，超出时淘汰最久未使用的条目；读取时检查过期时间。
+    条目以紧凑JSON字节保存，每次命中都解析出新的对象（lazy_values 时为新的 LazyJSON），
+    调用方修改返回的结果不会影响缓存中的值，也不会影响其他调用方。
+    """
+
+    def __init__(self, expire_seconds: Union[int, TTLPolicy] = 30 * 24 * 3600, max_entries: int = 10000,
+                 max_bytes: int = 64 * 1024 * 1024):
+        super().__init__(expire_seconds)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._data = OrderedDict()  # key -> (timestamp, JSON字节, size)
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    @property
+    def size_bytes(self) -> int:
+        return self._bytes
+
+    def lookup(self, key: str, max_stale: float = 0) -> Optional[Tuple[Any, float]]:
+        endpoint = endpoint_of(key)
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                self._stats.record(endpoint, misses=1)
+                return None
+            timestamp, raw, size = item
+            age = time.time() - timestamp
+            ttl = self.ttl_policy.ttl_for(endpoint)
+            if age >= ttl + max_stale:
+                expired = age >= self.ttl_policy.retention_for(endpoint)
+                if expired:
+                    # 超过保留期则删除
+                    del self._data[key]
+                    self._bytes -= size
+                self._stats.record(endpoint, misses=1, expirations=int(expired))
+                return None
+            self._data.move_to_end(key)
+        self._stats.record(endpoint, hits=1, stale_hits=int(age >= ttl), bytes_read=size)
+        return load_json(raw, lazy=self.lazy_values), timestamp
+
+    def set(self, key: str, value: Any, timestamp: float = None):
+        """
+        :param timestamp: 条目的写入时间，从下层缓存提升上来时沿用原始时间，保证过期时间一致
+        """
+        raw = dump_json(value)
+        size = len(raw)
+        if size > self.max_bytes:
+            # 单个条目超过容量上限，不进入内存缓存
+            return
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self._bytes -= old[2]
+            self._data[key] = (timestamp or time.time(), raw, size)
+            self._bytes += size
+            self._stats.record(endpoint_of(key), writes=1, bytes_written=size)
+            while self._data and (len(self._data) > self.max_entries or self._bytes > self.max_bytes):
+                _, (_, _, evicted_size) = self._data.popitem(last=False)
+                self._bytes -= evicted_size
+
+    def delete(self, key: str):
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self._bytes -= old[2]
+
+    def iterate(self, include_expired: bool = False) -> Iterator[CacheEntry]:
+        with self._lock:
+            items = list(self._data.items())
+        now = time.time()
+        for key, (timestamp, raw, _) in items:
+            if include_expired or not self._is_expired(key, timestamp, now):
+                yield CacheEntry(key, hash_key(key), timestamp, load_json(raw, lazy=self.lazy_values))
+
+    def compact(self) -> dict:
+        """
+        批量删除所有过期条目
+        :return: 清理结果统计
+        """
+        now = time.time()
+        expired = reclaimed = 0
+        with self._lock:
+            for key in [k for k, (timestamp, _, _) in self._data.items()
+                        if now - timestamp >= self.ttl_policy.retention_for(endpoint_of(k))]:
+                _, _, size = self._data.pop(key)
+                self._bytes -= size
+                expired += 1
+                reclaimed += size
+            return {'expired': expired, 'evicted': 0, 'reclaimed_bytes': reclaimed,
+                    'entries': len(self._data), 'bytes': self._bytes}
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
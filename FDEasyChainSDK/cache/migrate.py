@@ -0,0 +1,100 @@
+# _*_ codign:utf8 _*_
+"""====================================
+@Author:Sadam·Sadik
+@Email：1903249375@qq.com
+@Date：2026/10/18
+@Software: PyCharm
+@disc: 在缓存后端之间迁移条目
+======================================="""
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .base import CacheBackend
+from .keys import hash_key
+
+# 每读取多少个条目输出一次进度
+PROGRESS_INTERVAL = 100000
+
+
+def migrate_cache(source: CacheBackend, target: CacheBackend, workers: int = 4, batch_size: int = 500,
+                  lazy: bool = True) -> dict:
+    """
+    把源缓存中的有效条目复制到目标缓存，用于切换存储方式、目录布局或编码方式（如 文件缓存 -> SQLite、json -> zstd）
+    源缓存由当前线程流式遍历，写入由多个线程并行调用目标的 bulk_set；在途批次数有上限，内存占用与缓存大小无关。
+    旧格式没有保存缓存键的条目通过 bulk_set_by_hash 按条目哈希写入（文件缓存、SQLite、Redis），
+    目标不支持按哈希写入时计入 unkeyed；已过期、缓存键与条目哈希不一致的条目不迁移。
+    :param source: 源缓存
+    :param target: 目标缓存
+    :param workers: 并行写入的线程数
+    :param batch_size: 每次 bulk_set 写入的条目数
+    :param lazy: 以 LazyJSON 读取源缓存，目标为JSON类编码时原始字节直接写入，不解析
+    :return: 迁移结果统计
+    """
+    result = dict.fromkeys(('read', 'copied', 'expired', 'mismatched', 'unkeyed', 'failed'), 0)
+    result_lock = threading.Lock()
+    # 限制已读取、尚未写入的批次数（背压）
+    slots = threading.BoundedSemaphore(workers * 2)
+
+    def write(batch: list, by_hash: bool):
+        try:
+            if by_hash:
+                target.bulk_set_by_hash(batch)
+            else:
+                target.bulk_set(batch)
+            with result_lock:
+                result['copied'] += len(batch)
+        except NotImplementedError:
+            with result_lock:
+                result['unkeyed'] += len(batch)
+        except Exception as e:
+            logging.error(f"(缓存迁移) {len(batch)} 个条目写入失败: {e}")
+            with result_lock:
+                result['failed'] += len(batch)
+        finally:
+            slots.release()
+
+    def submit(batch: list, by_hash: bool = False):
+        slots.acquire()
+        executor.submit(write, batch, by_hash)
+
+    started = time.perf_counter()
+    now = time.time()
+    lazy_before = source.lazy_values
+    source.lazy_values = lazy
+    try:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='FDEasyChainMigrate') as executor:
+            batch = []
+            # 没有缓存键的条目: (key_hash, 值, 写入时间)
+            hash_batch = []
+            for entry in source.iterate(include_expired=True):
+                result['read'] += 1
+                if entry.key is not None and hash_key(entry.key) != entry.key_hash:
+                    result['mismatched'] += 1
+                elif source._is_expired(entry.key, entry.timestamp, now):
+                    result['expired'] += 1
+                elif entry.key is None:
+                    hash_batch.append((entry.key_hash, entry.value, entry.timestamp))
+                    if len(hash_batch) >= batch_size:
+                        submit(hash_batch, by_hash=True)
+                        hash_batch = []
+                else:
+                    batch.append((entry.key, entry.value, entry.timestamp))
+                    if len(batch) >= batch_size:
+                        submit(batch)
+                        batch = []
+                if result['read'] % PROGRESS_INTERVAL == 0:
+                    elapsed = time.perf_counter() - started
+                    logging.info(f"(缓存迁移) 已读取 {result['read']} 个条目，{result['read'] / elapsed:.0f} 条/秒")
+            if batch:
+                submit(batch)
+            if hash_batch:
+                submit(hash_batch, by_hash=True)
+    finally:
+        source.lazy_values = lazy_before
+    if result['unkeyed']:
+        logging.warning(f"(缓存迁移) 目标缓存不支持按哈希写入，{result['unkeyed']} 个没有缓存键的旧格式条目未迁移")
+    result['seconds'] = round(time.perf_counter() - started, 3)
+    result['entries_per_second'] = round(result['read'] / result['seconds']) if result['seconds'] else None
+    return result
@@ -0,0 +1,43 @@
+# _*_ codign:utf8 _*_
+"""====================================
+@Author:Sadam·Sadik
+@Email：1903249375@qq.com
+@Date：2026/10/18
+@Software: PyCharm
+@disc: 负缓存（查无数据的结果）
+======================================="""
+import time
+from typing import Any
+
+from .lazy import LazyJSON
+
+NEGATIVE_MARKER = '__fdec_negative__'
+_NEGATIVE_MARKER_BYTES = NEGATIVE_MARKER.encode('ascii')
+_NEGATIVE_MAX_BYTES = 4096
+
+
+def make_negative_entry(status_code: int, message: str, expire_seconds: int) -> dict:
+    """
+    构造负缓存条目，记录异常的状态码和信息，以便命中时重放同类异常
+    负缓存有自己的（通常更短的）过期时间，和条目一起保存，与存储后端无关
+    """
+    return {
+        NEGATIVE_MARKER: True,
+        'code': status_code,
+        'msg': message,
+        'expires_at': time.time() + expire_seconds,
+    }
+
+
+def is_negative_entry(value: Any) -> bool:
+    if isinstance(value, LazyJSON):
+        # 负缓存条目很小且以标记字段开头，先检查原始字节，避免为判断是否为负缓存解析大响应；已解析的直接判断
+        if not value.parsed and (len(value.raw) > _NEGATIVE_MAX_BYTES
+                                 or _NEGATIVE_MARKER_BYTES not in bytes(value.raw)):
+            return False
+        value = value.value
+    return isinstance(value, dict) and value.get(NEGATIVE_MARKER) is True
+
+
+def negative_entry_expired(value: dict) -> bool:
+    return time.time() >= value.get('expires_at', 0)
@@ -0,0 +1,59 @@
+# _*_ codign:utf8 _*_
+"""====================================
+@Author:Sadam·Sadik
+@Email：1903249375@qq.com
+@Date：2026/10/18
+@Software: PyCharm
+@disc: 缓存过期策略
+======================================="""
+from typing import Dict, Union
+
+
+class TTLPolicy:
+    """
+    按接口路径配置缓存过期时间
+    例如新闻舆情、开庭公告变化快，可以只缓存1天；工商基本信息、年报变化慢，可以缓存更久。
+    未单独配置的接口使用默认过期时间。过期时间为 0 表示该接口不缓存。
+    """
+
+    def __init__(self, default: int = 30 * 24 * 3600, per_path: Dict[str, int] = None, stale_grace: int = 0):
+        """
+        :param default: 默认过期时间（秒）
+        :param per_path: {接口路径: 过期时间（秒）}，接口路径如 '/company_news_query/'，首尾斜杠可省略
+        :param stale_grace: 过期后继续保留的时间（秒），保留期内的条目可以作为“陈旧数据”返回（stale-while-revalidate）
+        """
+        self.default = default
+        self.stale_grace = stale_grace
+        self.per_path = {self._normalize(path): ttl for path, ttl in (per_path or {}).items()}
+
+    @staticmethod
+    def _normalize(api_path: str) -> str:
+        # 统一为 SDK 内部使用的 '/xxx_query/' 形式
+        return f"/{api_path.strip('/')}/"
+
+    @classmethod
+    def coerce(cls, expire_seconds: Union[int, 'TTLPolicy']) -> 'TTLPolicy':
+        """把整数过期时间转换为只有默认值的策略"""
+        if isinstance(expire_seconds, TTLPolicy):
+            return expire_seconds
+        return cls(default=expire_seconds)
+
+    def ttl_for(self, api_path: str) -> int:
+        return self.per_path.get(self._normalize(api_path), self.default)
+
+    def retention_for(self, api_path: str) -> int:
+        """条目在存储中的保留时间：过期时间 + 陈旧数据保留期"""
+        ttl = self.ttl_for(api_path)
+        return ttl + self.stale_grace if ttl > 0 else 0
+
+    @property
+    def min_ttl(self) -> int:
+        """最短的有效过期时间（不计不缓存的接口）"""
+        return min([ttl for ttl in (self.default, *self.per_path.values()) if ttl > 0] or [0])
+
+    @property
+    def max_ttl(self) -> int:
+        return max([self.default, *self.per_path.values()])
+
+    def __repr__(self):
+        return f"TTLPolicy(default={self.default}, per_path={self.per_path}, stale_grace={self.stale_grace})"
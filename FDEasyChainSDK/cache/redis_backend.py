@@ -0,0 +1,201 @@
+# _*_ codign:utf8 _*_
+"""====================================
+@Author:Sadam·Sadik
+@Email：1903249375@qq.com
+@Date：2026/10/18
+@Software: PyCharm
+@disc: 基于Redis的共享缓存
+======================================="""
+import logging
+import math
+import struct
+import time
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple, Union
+
+from .base import BulkItems, CacheBackend, CacheEntry, iter_bulk_items
+from .codec import Codec, get_codec
+from .file import pack_entry, unpack_entry
+from .keys import endpoint_of, hash_key
+from .policy import TTLPolicy
+
+try:
+    import redis
+except ImportError:  # pragma: no cover - 可选依赖
+    redis = None
+
+# SCAN 每次返回的建议条目数
+SCAN_COUNT = 500
+
+
+class RedisCache(CacheBackend):
+    """
+    Redis缓存，多台机器上的采集进程共享同一份缓存
+    值的格式与文件缓存相同（文件头 + 编码后的值），过期由 Redis 的 key TTL 负责（TTL = 保留期），
+    因此 compact 无需扫描；容量上限请通过 Redis 的 maxmemory 策略配置。
+    Redis 不可用时读取按未命中处理、写入和删除记录日志后丢弃，接口调用不受影响。
+    """
+
+    def __init__(self, url: str = 'redis://localhost:6379/0', expire_seconds: Union[int, TTLPolicy] = 30 * 24 * 3600,
+                 codec: Union[str, Codec] = 'json', prefix: str = 'fdec:', client: Any = None):
+        """
+        :param url: Redis连接地址，传入 client 时忽略
+        :param expire_seconds: 缓存过期时间（秒），或按接口路径配置过期时间的 TTLPolicy
+        :param codec: 缓存值的编码方式
+        :param prefix: Redis key 前缀，多个应用共用同一个库时用于区分
+        :param client: 已创建的 redis.Redis 客户端（需 decode_responses=False）
+        """
+        super().__init__(expire_seconds)
+        if client is None:
+            if redis is None:
+                raise ImportError("使用 Redis 缓存需要先安装: pip install redis")
+            client = redis.Redis.from_url(url)
+        self._client = client
+        self.codec = get_codec(codec)
+        self.prefix = prefix
+
+    def _redis_key(self, key_hash: str) -> str:
+        return f"{self.prefix}{key_hash}"
+
+    def _expire_for(self, key: Optional[str], timestamp: float) -> Optional[int]:
+        """Redis key 的剩余存活时间（秒），已超过保留期时返回 None；没有缓存键的条目按最长保留期计算"""
+        if key is None:
+            retention = self.ttl_policy.max_ttl + self.ttl_policy.stale_grace
+        else:
+            retention = self.ttl_policy.retention_for(endpoint_of(key))
+        remaining = retention - (time.time() - timestamp)
+        return math.ceil(remaining) if remaining > 0 else None
+
+    def _decode_entry(self, key: str, data: Optional[bytes], max_stale: float,
+                      elapsed: float) -> Optional[Tuple[Any, float]]:
+        endpoint = endpoint_of(key)
+        if data is None:
+            self._stats.record(endpoint, misses=1, read_seconds=elapsed)
+            return None
+        try:
+            _, timestamp, value = unpack_entry(data, lazy=self.lazy_values)
+        except (ValueError, KeyError, TypeError, struct.error):
+            # 如果解析出错，删除可能损坏的缓存条目
+            self.delete(key)
+            self._stats.record(endpoint, misses=1, corrupt=1, read_seconds=elapsed)
+            return None
+        age = time.time() - timestamp
+        ttl = self.ttl_policy.ttl_for(endpoint)
+        if age >= ttl + max_stale:
+            self._stats.record(endpoint, misses=1, bytes_read=len(data), read_seconds=elapsed)
+            return None
+        self._stats.record(endpoint, hits=1, stale_hits=int(age >= ttl), bytes_read=len(data), read_seconds=elapsed)
+        return value, timestamp
+
+    def lookup(self, key: str, max_stale: float = 0) -> Optional[Tuple[Any, float]]:
+        started = time.perf_counter()
+        try:
+            data = self._client.get(self._redis_key(hash_key(key)))
+        except Exception as e:
+            # Redis 不可用时按未命中处理，不影响接口调用
+            logging.warning(f"(缓存读取失败) {key}: {e}")
+            data = None
+        return self._decode_entry(key, data, max_stale, time.perf_counter() - started)
+
+    def set(self, key: str, value: Any, timestamp: float = None):
+        self._write_entry(hash_key(key), key, value, timestamp)
+
+    def set_by_hash(self, key_hash: str, value: Any, timestamp: float = None):
+        self._write_entry(key_hash, None, value, timestamp)
+
+    def _write_entry(self, key_hash: str, key: Optional[str], value: Any, timestamp: Optional[float]):
+        started = time.perf_counter()
+        timestamp = timestamp or time.time()
+        expire = self._expire_for(key, timestamp)
+        if expire is None:
+            return
+        data = pack_entry(key, timestamp, self.codec.encode(value))
+        try:
+            self._client.set(self._redis_key(key_hash), data, ex=expire)
+        except Exception as e:
+            logging.error(f"(缓存写入失败) {key or key_hash}: {e}")
+            return
+        self._stats.record(endpoint_of(key) if key else '', writes=1, bytes_written=len(data),
+                           write_seconds=time.perf_counter() - started)
+
+    def bulk_get(self, keys: Iterable[str], max_stale: float = 0) -> Dict[str, Tuple[Any, float]]:
+        """一次 MGET 往返读取所有键"""
+        keys = list(dict.fromkeys(keys))
+        if not keys:
+            return {}
+        started = time.perf_counter()
+        try:
+            values = self._client.mget([self._redis_key(hash_key(key)) for key in keys])
+        except Exception as e:
+            logging.warning(f"(缓存批量读取失败) {len(keys)} 个条目: {e}")
+            values = [None] * len(keys)
+        elapsed = (time.perf_counter() - started) / len(keys)
+        result = {}
+        for key, data in zip(keys, values):
+            entry = self._decode_entry(key, data, max_stale, elapsed)
+            if entry is not None:
+                result[key] = entry
+        return result
+
+    def bulk_set(self, items: BulkItems, timestamp: float = None):
+        """通过 pipeline 一次往返写入所有条目"""
+        started = time.perf_counter()
+        now = time.time()
+        written = []
+        pipe = self._client.pipeline(transaction=False)
+        for key, value, item_timestamp in iter_bulk_items(items, timestamp):
+            item_timestamp = item_timestamp or now
+            expire = self._expire_for(key, item_timestamp)
+            if expire is None:
+                continue
+            data = pack_entry(key, item_timestamp, self.codec.encode(value))
+            pipe.set(self._redis_key(hash_key(key)), data, ex=expire)
+            written.append((endpoint_of(key), len(data)))
+        if not written:
+            return
+        try:
+            pipe.execute()
+        except Exception as e:
+            logging.error(f"(缓存批量写入失败) {len(written)} 个条目: {e}")
+            return
+        elapsed = (time.perf_counter() - started) / len(written)
+        for endpoint, size in written:
+            self._stats.record(endpoint, writes=1, bytes_written=size, write_seconds=elapsed)
+
+    def delete(self, key: str):
+        try:
+            self._client.delete(self._redis_key(hash_key(key)))
+        except Exception as e:
+            logging.error(f"(缓存删除失败) {key}: {e}")
+
+    def iterate(self, include_expired: bool = False) -> Iterator[CacheEntry]:
+        """通过 SCAN 增量遍历，每批用 MGET 读取"""
+        batch = []
+        for redis_key in self._client.scan_iter(match=f"{self.prefix}*", count=SCAN_COUNT):
+            batch.append(redis_key)
+            if len(batch) >= SCAN_COUNT:
+                yield from self._load_batch(batch, include_expired)
+                batch = []
+        if batch:
+            yield from self._load_batch(batch, include_expired)
+
+    def _load_batch(self, redis_keys: list, include_expired: bool) -> Iterator[CacheEntry]:
+        now = time.time()
+        for redis_key, data in zip(redis_keys, self._client.mget(redis_keys)):
+            if data is None:
+                continue
+            try:
+                key, timestamp, value = unpack_entry(data, lazy=self.lazy_values)
+            except (ValueError, KeyError, TypeError, struct.error):
+                continue
+            if include_expired or not self._is_expired(key, timestamp, now):
+                if isinstance(redis_key, bytes):
+                    redis_key = redis_key.decode('utf-8')
+                yield CacheEntry(key, redis_key[len(self.prefix):], timestamp, value)
+
+    def compact(self) -> dict:
+        """过期由 Redis 自动处理，这里只返回当前条目数"""
+        entries = sum(1 for _ in self._client.scan_iter(match=f"{self.prefix}*", count=SCAN_COUNT))
+        return {'expired': 0, 'evicted': 0, 'reclaimed_bytes': 0, 'entries': entries, 'bytes': None}
+
+    def close(self):
+        self._client.close()
@@ -0,0 +1,334 @@
+# _*_ codign:utf8 _*_
+"""====================================
+@Author:Sadam·Sadik
+@Email：1903249375@qq.com
+@Date：2026/10/18
+@Software: PyCharm
+@disc: 本机缓存服务（Unix socket），供同一台机器上的多个采集进程共享
+======================================="""
+import json
+import logging
+import os
+import socket
+import socketserver
+import struct
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple, Union
+
+from ..base import BulkItems, CacheBackend, CacheEntry, iter_bulk_items
+from ..keys import IndexEntry
+from ..lazy import LazyJSON
+from ..policy import TTLPolicy
+
+DEFAULT_SOCKET_PATH = Path.home() / '.data-crawled' / 'FDEasyChain.sock'
+# 帧格式: 4字节长度(大端) + UTF-8 JSON；缓存值以JSON文本（字符串）传输，两端都不必解析
+_FRAME_HEADER = struct.Struct('>I')
+MAX_FRAME_BYTES = 256 * 1024 * 1024
+# iterate 每帧返回的条目数
+ITERATE_BATCH = 500
+
+
+if hasattr(socketserver, 'ThreadingUnixStreamServer'):
+    class _ThreadingUnixServer(socketserver.ThreadingUnixStreamServer):
+        daemon_threads = True
+else:  # pragma: no cover - Windows
+    _ThreadingUnixServer = None
+
+
+def _dump_value(value: Any) -> str:
+    """缓存值转为传输用的JSON文本，LazyJSON 直接使用原始字节"""
+    if isinstance(value, LazyJSON):
+        return bytes(value.raw).decode('utf-8')
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':'))
+
+
+def _load_value(text: str, lazy: bool) -> Any:
+    return LazyJSON(text.encode('utf-8')) if lazy else json.loads(text)
+
+
+def _send(sock: socket.socket, message: dict):
+    data = json.dumps(message, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    sock.sendall(_FRAME_HEADER.pack(len(data)) + data)
+
+
+def _recv_exactly(sock: socket.socket, size: int) -> Optional[bytes]:
+    buf = bytearray()
+    while len(buf) < size:
+        chunk = sock.recv(min(size - len(buf), 1024 * 1024))
+        if not chunk:
+            return None
+        buf += chunk
+    return bytes(buf)
+
+
+def _recv(sock: socket.socket) -> Optional[dict]:
+    """读取一帧，连接已关闭时返回 None"""
+    header = _recv_exactly(sock, _FRAME_HEADER.size)
+    if header is None:
+        return None
+    size = _FRAME_HEADER.unpack(header)[0]
+    if size > MAX_FRAME_BYTES:
+        raise ValueError(f"帧过大: {size} 字节")
+    data = _recv_exactly(sock, size)
+    if data is None:
+        return None
+    return json.loads(data)
+
+
+class CacheServer:
+    """
+    本机缓存服务
+    由一个进程持有缓存存储（一个共享的内存缓存层 + 一个后台写线程），其他进程通过 Unix socket 上的
+    RemoteCache 读写，避免每个采集进程各自维护内存缓存层、争抢磁盘。socket 文件权限为 0600，只有同一用户可以连接。
+    """
+
+    def __init__(self, backend: CacheBackend, socket_path: Union[str, Path] = None):
+        """
+        :param backend: 服务端持有的缓存存储，通常是 TieredCache([MemoryCache, WriteBehindCache(磁盘缓存)])
+        :param socket_path: Unix socket 路径，默认 ~/.data-crawled/FDEasyChain.sock
+        """
+        self.backend = backend
+        # 服务端只转发缓存值的原始字节，不解析
+        self.backend.lazy_values = True
+        self.socket_path = Path(socket_path).expanduser() if socket_path else DEFAULT_SOCKET_PATH
+        self._server = None
+
+    def _handle(self, request: dict) -> dict:
+        op = request.get('op')
+        backend = self.backend
+        if op == 'lookup':
+            entry = backend.lookup(request['key'], max_stale=request.get('max_stale', 0))
+            return {'result': None if entry is None else [_dump_value(entry[0]), entry[1]]}
+        if op == 'bulk_get':
+            found = backend.bulk_get(request['keys'], max_stale=request.get('max_stale', 0))
+            return {'result': {key: [_dump_value(value), timestamp] for key, (value, timestamp) in found.items()}}
+        if op == 'set':
+            backend.set(request['key'], _load_value(request['value'], lazy=True), timestamp=request.get('timestamp'))
+            return {'result': None}
+        if op == 'bulk_set':
+            backend.bulk_set([(key, _load_value(value, lazy=True), timestamp)
+                              for key, value, timestamp in request['items']])
+            return {'result': None}
+        if op == 'delete':
+            backend.delete(request['key'])
+            return {'result': None}
+        if op == 'list_entries':
+            entries = backend.list_entries(request.get('subject'), request.get('subject_prefix'),
+                                           request.get('api_path'), request.get('include_expired', False))
+            return {'result': [list(entry) for entry in entries]}
+        if op == 'invalidate':
+            return {'result': backend.invalidate(request.get('subject'), request.get('api_path'))}
+        if op == 'compact':
+            return {'result': backend.compact()}
+        if op == 'stats':
+            return {'result': backend.stats()}
+        if op == 'reset_stats':
+            backend.reset_stats()
+            return {'result': None}
+        if op == 'config':
+            policy = backend.ttl_policy
+            return {'result': {'default': policy.default, 'per_path': policy.per_path,
+                               'stale_grace': policy.stale_grace}}
+        raise ValueError(f"不支持的操作: {op}")
+
+    def _serve_connection(self, sock: socket.socket):
+        while True:
+            request = _recv(sock)
+            if request is None:
+                return
+            if request.get('op') == 'iterate':
+                # 流式返回：多帧条目，最后一帧 done
+                batch = []
+                for entry in self.backend.iterate(include_expired=request.get('include_expired', False)):
+                    batch.append([entry.key, entry.key_hash, entry.timestamp, _dump_value(entry.value)])
+                    if len(batch) >= ITERATE_BATCH:
+                        _send(sock, {'entries': batch})
+                        batch = []
+                _send(sock, {'entries': batch, 'done': True})
+                continue
+            try:
+                response = self._handle(request)
+            except Exception as e:
+                logging.error(f"(缓存服务) {request.get('op')} 失败: {e}")
+                response = {'error': f"{type(e).__name__}: {e}"}
+            _send(sock, response)
+
+    def serve_forever(self):
+        """启动服务并阻塞，直到 shutdown()"""
+        if _ThreadingUnixServer is None:
+            raise RuntimeError("当前平台不支持 Unix socket")
+        server = self
+
+        class Handler(socketserver.BaseRequestHandler):
+            def handle(self):
+                try:
+                    server._serve_connection(self.request)
+                except (OSError, ValueError) as e:
+                    logging.warning(f"(缓存服务) 连接异常断开: {e}")
+
+        self.socket_path.parent.mkdir(parents=True, exist_ok=True)
+        if self.socket_path.exists():
+            # 上次异常退出残留的 socket 文件
+            self.socket_path.unlink()
+        self._server = _ThreadingUnixServer(str(self.socket_path), Handler)
+        os.chmod(self.socket_path, 0o600)
+        print("CacheServer:", self.socket_path)
+        try:
+            self._server.serve_forever()
+        finally:
+            self._server.server_close()
+            try:
+                self.socket_path.unlink()
+            except OSError:
+                pass
+            self.backend.close()
+
+    def shutdown(self):
+        if self._server is not None:
+            self._server.shutdown()
+
+
+class RemoteCache(CacheBackend):
+    """
+    CacheServer 的客户端，按 CacheBackend 接口访问服务端的缓存
+    每个线程使用独立的连接；服务不可用时读取按未命中处理、写入记录日志后丢弃，下次调用时自动重连。
+    创建时服务不可用同样不报错：过期策略暂用 expire_seconds，首次连接成功后改为服务端的配置。
+    """
+
+    def __init__(self, socket_path: Union[str, Path] = None, timeout: float = 10,
+                 expire_seconds: Union[int, TTLPolicy] = 30 * 24 * 3600):
+        """
+        :param socket_path: 服务端的 Unix socket 路径，默认 ~/.data-crawled/FDEasyChain.sock
+        :param timeout: 单次请求的超时时间（秒）
+        :param expire_seconds: 取得服务端配置之前使用的过期时间或 TTLPolicy
+        """
+        super().__init__(expire_seconds)
+        self.socket_path = Path(socket_path).expanduser() if socket_path else DEFAULT_SOCKET_PATH
+        self.timeout = timeout
+        self._local = threading.local()
+        self._config_loaded = False
+        try:
+            self._connection()
+        except (OSError, ValueError, RuntimeError) as e:
+            logging.warning(f"(缓存服务不可用) {self.socket_path}: {e}")
+
+    def _load_config(self):
+        """
+        读取服务端的过期策略，客户端据此判断是否陈旧
+        原地更新 ttl_policy，调用方持有的同一个策略对象随之生效
+        """
+        config = self._call({'op': 'config'})
+        self.ttl_policy.default = config['default']
+        self.ttl_policy.per_path = dict(config['per_path'])
+        self.ttl_policy.stale_grace = config['stale_grace']
+        self._config_loaded = True
+
+    def _connection(self) -> socket.socket:
+        sock = getattr(self._local, 'sock', None)
+        if sock is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            try:
+                sock.connect(str(self.socket_path))
+            except OSError:
+                sock.close()
+                raise
+            self._local.sock = sock
+            if not self._config_loaded:
+                self._load_config()
+        return sock
+
+    def _disconnect(self):
+        sock = getattr(self._local, 'sock', None)
+        if sock is not None:
+            self._local.sock = None
+            sock.close()
+
+    def _call(self, request: dict) -> Any:
+        try:
+            sock = self._connection()
+            _send(sock, request)
+            response = _recv(sock)
+        except (OSError, ValueError):
+            # 连接状态未知，丢弃连接
+            self._disconnect()
+            raise
+        if response is None:
+            self._disconnect()
+            raise ConnectionError("缓存服务已关闭连接")
+        if 'error' in response:
+            raise RuntimeError(f"缓存服务错误: {response['error']}")
+        return response['result']
+
+    def _call_quietly(self, request: dict, default: Any = None) -> Any:
+        """读写缓存失败不影响接口调用"""
+        try:
+            return self._call(request)
+        except (OSError, ValueError, RuntimeError) as e:
+            logging.warning(f"(缓存服务不可用) {request['op']}: {e}")
+            return default
+
+    def lookup(self, key: str, max_stale: float = 0) -> Optional[Tuple[Any, float]]:
+        result = self._call_quietly({'op': 'lookup', 'key': key, 'max_stale': max_stale})
+        if result is None:
+            return None
+        return _load_value(result[0], self.lazy_values), result[1]
+
+    def bulk_get(self, keys: Iterable[str], max_stale: float = 0) -> Dict[str, Tuple[Any, float]]:
+        result = self._call_quietly({'op': 'bulk_get', 'keys': list(keys), 'max_stale': max_stale}, {})
+        return {key: (_load_value(value, self.lazy_values), timestamp) for key, (value, timestamp) in result.items()}
+
+    def set(self, key: str, value: Any, timestamp: float = None):
+        self._call_quietly({'op': 'set', 'key': key, 'value': _dump_value(value),
+                            'timestamp': timestamp or time.time()})
+
+    def bulk_set(self, items: BulkItems, timestamp: float = None):
+        now = time.time()
+        items = [[key, _dump_value(value), item_timestamp or now]
+                 for key, value, item_timestamp in iter_bulk_items(items, timestamp)]
+        if items:
+            self._call_quietly({'op': 'bulk_set', 'items': items})
+
+    def delete(self, key: str):
+        self._call({'op': 'delete', 'key': key})
+
+    def iterate(self, include_expired: bool = False) -> Iterator[CacheEntry]:
+        # 流式读取占用当前线程的连接，使用单独的连接
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(str(self.socket_path))
+            _send(sock, {'op': 'iterate', 'include_expired': include_expired})
+            while True:
+                response = _recv(sock)
+                if response is None:
+                    raise ConnectionError("缓存服务已关闭连接")
+                for key, key_hash, timestamp, value in response['entries']:
+                    yield CacheEntry(key, key_hash, timestamp, _load_value(value, self.lazy_values))
+                if response.get('done'):
+                    return
+        finally:
+            sock.close()
+
+    def list_entries(self, subject: str = None, subject_prefix: str = None, api_path: str = None,
+                     include_expired: bool = False) -> Iterator[IndexEntry]:
+        entries = self._call({'op': 'list_entries', 'subject': subject, 'subject_prefix': subject_prefix,
+                              'api_path': api_path, 'include_expired': include_expired})
+        return iter([IndexEntry(*entry) for entry in entries])
+
+    def invalidate(self, subject: str = None, api_path: str = None) -> int:
+        return self._call({'op': 'invalidate', 'subject': subject, 'api_path': api_path})
+
+    def compact(self) -> dict:
+        return self._call({'op': 'compact'})
+
+    def stats(self) -> dict:
+        return self._call({'op': 'stats'})
+
+    def reset_stats(self):
+        self._call({'op': 'reset_stats'})
+
+    def close(self):
+        self._disconnect()
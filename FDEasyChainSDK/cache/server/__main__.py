@@ -0,0 +1,62 @@
+# _*_ codign:utf8 _*_
+"""====================================
+@Author:Sadam·Sadik
+@Email：1903249375@qq.com
+@Date：2026/10/18
+@Software: PyCharm
+@disc: 启动本机缓存服务
+
+    python -m FDEasyChainSDK.cache.server --backend sqlite --memory-entries 200000
+======================================="""
+import argparse
+import json
+import logging
+
+from ..file import APICache
+from ..memory import MemoryCache
+from ..policy import TTLPolicy
+from ..sqlite import SQLiteCache
+from ..tiered import TieredCache
+from ..writebehind import WriteBehindCache
+from . import DEFAULT_SOCKET_PATH, CacheServer
+
+
+def main(argv=None):
+    """python -m FDEasyChainSDK.cache.server"""
+    parser = argparse.ArgumentParser(prog='python -m FDEasyChainSDK.cache.server',
+                                     description="FDEasyChain 本机缓存服务")
+    parser.add_argument('--socket', default=str(DEFAULT_SOCKET_PATH), help="Unix socket 路径")
+    parser.add_argument('--backend', choices=('file', 'sqlite'), default='file', help="磁盘缓存存储方式")
+    parser.add_argument('--cache-dir', default=None, help="文件缓存目录")
+    parser.add_argument('--db-path', default=None, help="SQLite缓存数据库路径")
+    parser.add_argument('--codec', default='json', help="缓存值的编码方式")
+    parser.add_argument('--layout', choices=('flat', 'sharded'), default='flat', help="文件缓存的目录布局")
+    parser.add_argument('--expire-seconds', type=int, default=30 * 24 * 3600, help="缓存过期时间（秒）")
+    parser.add_argument('--stale-grace', type=int, default=0, help="过期后继续保留的时间（秒）")
+    parser.add_argument('--ttl-policy', default=None,
+                        help="按接口路径配置的过期时间（JSON），如 '{\"/company_news_query/\": 86400}'")
+    parser.add_argument('--memory-entries', type=int, default=100000, help="共享内存缓存层的条目数上限，0 表示不启用")
+    parser.add_argument('--memory-bytes', type=int, default=512 * 1024 * 1024, help="共享内存缓存层的字节数上限")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+
+    policy = TTLPolicy(default=args.expire_seconds, stale_grace=args.stale_grace,
+                       per_path=json.loads(args.ttl_policy) if args.ttl_policy else None)
+    if args.backend == 'sqlite':
+        disk = SQLiteCache(expire_seconds=policy, db_path=args.db_path, codec=args.codec)
+    else:
+        disk = APICache(expire_seconds=policy, codec=args.codec, cache_dir=args.cache_dir, layout=args.layout)
+    # 所有写入由一个后台线程批量落盘
+    backend = WriteBehindCache(disk)
+    if args.memory_entries > 0:
+        backend = TieredCache([MemoryCache(expire_seconds=policy, max_entries=args.memory_entries,
+                                           max_bytes=args.memory_bytes), backend])
+    server = CacheServer(backend, socket_path=args.socket)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
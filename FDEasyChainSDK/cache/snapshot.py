@@ -0,0 +1,206 @@
+# _*_ codign:utf8 _*_
+"""====================================
+@Author:Sadam·Sadik
+@Email：1903249375@qq.com
+@Date：2026/10/18
+@Software: PyCharm
+@disc: 只读的缓存快照文件（mmap）
+======================================="""
+import hashlib
+import mmap
+import os
+import struct
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Iterator, Optional, Set, Tuple, Union
+
+from .base import BulkItems, CacheBackend, CacheEntry
+from .codec import Codec, decode, get_codec
+from .file import _HEADER, pack_entry
+from .keys import endpoint_of
+from .policy import TTLPolicy
+
+# 快照文件格式:
+#   文件头: MAGIC + 条目数(uint64) + 哈希表槽数(uint32) + 哈希表偏移(uint64) + 导出时间(double)
+#   数据区: 依次存放与文件缓存相同格式的条目（文件头 + 缓存键 + 编码后的值）
+#   哈希表: 开放寻址（线性探测），每个槽为 缓存键MD5(16字节) + 条目偏移(uint64) + 条目长度(uint32)，偏移为0表示空槽
+SNAPSHOT_MAGIC = b'FDS1'
+_SNAPSHOT_HEADER = struct.Struct('<4sQIQd')
+_SLOT = struct.Struct('<16sQI')
+# 哈希表装载因子不超过 0.5，未命中时的探测次数很少
+_LOAD_FACTOR = 0.5
+
+
+def _digest(key: str) -> bytes:
+    return hashlib.md5(key.encode('utf-8')).digest()
+
+
+def _bucket(digest: bytes, mask: int) -> int:
+    return int.from_bytes(digest[:8], 'little') & mask
+
+
+def export_snapshot(cache: CacheBackend, path: Union[str, Path], codec: Union[str, Codec] = 'json',
+                    include_expired: bool = False) -> int:
+    """
+    把缓存内容导出为一个只读快照文件，用于分发预热好的缓存（拷贝一个大文件远快于拷贝数百万个小文件）
+    先写同目录下的临时文件，完成后 rename，读取方不会看到写了一半的快照
+    :param cache: 要导出的缓存，如 APICache/SQLiteCache
+    :param path: 快照文件路径
+    :param codec: 快照中缓存值的编码方式；'json' 时 SnapshotCache 可以零拷贝返回 LazyJSON
+    :param include_expired: 是否导出已过期、尚未清理的条目
+    :return: 导出的条目数
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    codec = get_codec(codec)
+    # 每个条目的 (MD5, 偏移, 长度) 紧凑地保存在 bytearray 中，千万级条目也只占几百MB
+    slots = bytearray()
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix='.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(b'\0' * _SNAPSHOT_HEADER.size)
+            offset = _SNAPSHOT_HEADER.size
+            for entry in cache.iterate(include_expired=include_expired):
+                # 槽中的摘要即缓存键的MD5（= key_hash），旧格式没有保存缓存键的条目同样可以按键查找
+                data = pack_entry(entry.key, entry.timestamp, codec.encode(entry.value))
+                f.write(data)
+                slots += _SLOT.pack(bytes.fromhex(entry.key_hash), offset, len(data))
+                offset += len(data)
+            n_slots = len(slots) // _SLOT.size
+            n_buckets = 1
+            while n_buckets * _LOAD_FACTOR < max(n_slots, 1):
+                n_buckets <<= 1
+            mask = n_buckets - 1
+            table = bytearray(n_buckets * _SLOT.size)
+            count = 0
+            for i in range(n_slots):
+                slot = slots[i * _SLOT.size:(i + 1) * _SLOT.size]
+                digest = bytes(slot[:16])
+                bucket = _bucket(digest, mask)
+                while True:
+                    slot_digest, slot_offset, _ = _SLOT.unpack_from(table, bucket * _SLOT.size)
+                    if not slot_offset or slot_digest == digest:
+                        break
+                    bucket = (bucket + 1) & mask
+                # 遍历期间同一条目可能出现两次，探测到相同摘要时保留先写入的
+                if slot_offset:
+                    continue
+                table[bucket * _SLOT.size:(bucket + 1) * _SLOT.size] = slot
+                count += 1
+            f.write(table)
+            f.seek(0)
+            f.write(_SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, count, n_buckets, offset, time.time()))
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+    return count
+
+
+class SnapshotCache(CacheBackend):
+    """
+    只读的快照缓存层，通过 mmap 打开 export_snapshot() 导出的快照文件
+    查找只需计算一次MD5并探测哈希表，值直接从映射的内存切片解码（lazy 模式下不复制）；
+    多个进程打开同一快照时共享操作系统的页缓存。写入对本层无效，放在可写缓存之后组成 TieredCache，
+    可写缓存未命中时再查快照，刷新或重新请求得到的新值写入可写缓存后优先于快照中的旧值。
+    """
+    read_only = True
+
+    def __init__(self, path: Union[str, Path], expire_seconds: Union[int, TTLPolicy] = 30 * 24 * 3600):
+        """
+        :param path: 快照文件路径
+        :param expire_seconds: 缓存过期时间（秒），或按接口路径配置过期时间的 TTLPolicy；快照中的条目同样按写入时间判断过期
+        """
+        super().__init__(expire_seconds)
+        self.path = Path(path)
+        print("CacheSnapshot:", self.path)
+        with open(self.path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mmap)
+        magic, self.entries, self._n_buckets, self._table_offset, self.created_at = \
+            _SNAPSHOT_HEADER.unpack_from(self._view)
+        if magic != SNAPSHOT_MAGIC:
+            self.close()
+            raise ValueError(f"不是有效的缓存快照文件: {self.path}")
+        self._mask = self._n_buckets - 1
+        # 本进程内删除/失效的条目（缓存键的MD5），快照本身只读
+        self._deleted: Set[bytes] = set()
+
+    def _find(self, digest: bytes) -> Optional[memoryview]:
+        bucket = _bucket(digest, self._mask)
+        while True:
+            slot_digest, offset, length = _SLOT.unpack_from(self._view, self._table_offset + bucket * _SLOT.size)
+            if not offset:
+                return None
+            if slot_digest == digest:
+                return self._view[offset:offset + length]
+            bucket = (bucket + 1) & self._mask
+
+    def _unpack(self, data: memoryview) -> Tuple[Optional[str], float, Any]:
+        _, timestamp, key_len = _HEADER.unpack_from(data)
+        offset = _HEADER.size + key_len
+        key = bytes(data[_HEADER.size:offset]).decode('utf-8') or None
+        return key, timestamp, decode(data[offset:], lazy=self.lazy_values)
+
+    def lookup(self, key: str, max_stale: float = 0) -> Optional[Tuple[Any, float]]:
+        endpoint = endpoint_of(key)
+        started = time.perf_counter()
+        digest = _digest(key)
+        data = None if digest in self._deleted else self._find(digest)
+        if data is None:
+            self._stats.record(endpoint, misses=1, read_seconds=time.perf_counter() - started)
+            return None
+        try:
+            _, timestamp, value = self._unpack(data)
+        except (ValueError, TypeError, struct.error):
+            self._stats.record(endpoint, misses=1, corrupt=1, read_seconds=time.perf_counter() - started)
+            return None
+        age = time.time() - timestamp
+        ttl = self.ttl_policy.ttl_for(endpoint)
+        if age >= ttl + max_stale:
+            self._stats.record(endpoint, misses=1, read_seconds=time.perf_counter() - started)
+            return None
+        self._stats.record(endpoint, hits=1, stale_hits=int(age >= ttl), bytes_read=len(data),
+                           read_seconds=time.perf_counter() - started)
+        return value, timestamp
+
+    def set(self, key: str, value: Any, timestamp: float = None):
+        """快照只读，写入由 TieredCache 中的下层缓存负责"""
+        pass
+
+    def bulk_set(self, items: BulkItems, timestamp: float = None):
+        pass
+
+    def delete(self, key: str):
+        self._deleted.add(_digest(key))
+
+    def iterate(self, include_expired: bool = False) -> Iterator[CacheEntry]:
+        now = time.time()
+        for bucket in range(self._n_buckets):
+            slot_digest, offset, length = _SLOT.unpack_from(self._view, self._table_offset + bucket * _SLOT.size)
+            if not offset:
+                continue
+            try:
+                key, timestamp, value = self._unpack(self._view[offset:offset + length])
+            except (ValueError, TypeError, struct.error):
+                continue
+            if slot_digest in self._deleted or (not include_expired and self._is_expired(key, timestamp, now)):
+                continue
+            yield CacheEntry(key, slot_digest.hex(), timestamp, value)
+
+    def compact(self) -> dict:
+        """快照只读，没有可清理的内容"""
+        return {'expired': 0, 'evicted': 0, 'reclaimed_bytes': 0, 'entries': self.entries,
+                'bytes': len(self._mmap)}
+
+    def close(self):
+        self._view.release()
+        try:
+            self._mmap.close()
+        except BufferError:
+            # 仍有 LazyJSON 引用着映射的内存，由垃圾回收在引用释放后关闭
+            pass
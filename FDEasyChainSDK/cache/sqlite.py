@@ -0,0 +1,465 @@
+# _*_ codign:utf8 _*_
+"""====================================
+@Author:Sadam·Sadik
+@Email：1903249375@qq.com
+@Date：2026/10/18
+@Software: PyCharm
+@disc: 基于SQLite的单文件缓存
+======================================="""
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple, Union
+
+from .base import VERIFY_FIELDS, BulkItems, CacheBackend, CacheEntry, iter_bulk_items
+from .codec import Codec, decode, get_codec
+from .index import index_where
+from .keys import IndexEntry, endpoint_of, hash_key, index_fields
+from .policy import TTLPolicy
+
+# 超出容量上限时淘汰到上限的90%，避免每次写入都触发淘汰
+EVICT_LOW_WATERMARK = 0.9
+# 批量读取/遍历时每条SQL处理的条目数，不超过 SQLite 默认的参数个数上限
+BATCH_SIZE = 500
+_INSERT_SQL = ("INSERT OR REPLACE INTO api_cache"
+               " (key_hash, endpoint, subject, page, created_at, accessed_at, size, cache_key, value)"
+               " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)")
+
+
+class SQLiteCache(CacheBackend):
+    """
+    单文件SQLite缓存，与 APICache 的 get/set 接口保持一致
+    所有缓存条目保存在一个数据库文件中（WAL模式），避免海量小文件带来的inode压力；
+    键哈希、接口路径和写入时间均建有索引，过期清理通过一次范围删除完成。
+    """
+
+    def __init__(self, expire_seconds: Union[int, TTLPolicy] = 30 * 24 * 3600, db_path: Union[str, Path] = None,  # 默认30天
+                 codec: Union[str, Codec] = 'json', max_bytes: int = None, max_entries: int = None,
+                 eviction: str = 'lru'):
+        """
+        :param expire_seconds: 缓存过期时间（秒），或按接口路径配置过期时间的 TTLPolicy
+        :param db_path: 数据库文件路径，默认 ~/.data-crawled/FDEasyChain.sqlite3
+        :param codec: 缓存值的编码方式
+        :param max_bytes: 缓存值总字节数上限，None 表示不限制
+        :param max_entries: 缓存条目数上限，None 表示不限制
+        :param eviction: 超出上限时的淘汰策略，'lru' 最久未访问优先，'oldest' 最早写入优先
+        """
+        if eviction not in ('lru', 'oldest'):
+            raise ValueError(f"不支持的淘汰策略: {eviction}")
+        super().__init__(expire_seconds)
+        self.codec = get_codec(codec)
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.eviction = eviction
+        # 默认在用户主目录下创建缓存数据库
+        self.db_path = Path(db_path) if db_path else Path.home() / '.data-crawled' / 'FDEasyChain.sqlite3'
+        print("CacheDB:", self.db_path)
+        self.db_path.parent.mkdir(exist_ok=True, parents=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), timeout=30, check_same_thread=False,
+                                     isolation_level=None)
+        # 条目数/字节数的运行计数，仅在设置了容量上限时维护，避免每次写入都全表统计
+        self._entries = 0
+        self._bytes = 0
+        self._init_db()
+        self.purge_expired()
+
+    @property
+    def _bounded(self) -> bool:
+        return self.max_bytes is not None or self.max_entries is not None
+
+    def _init_db(self):
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS api_cache ("
+                " key_hash TEXT PRIMARY KEY,"
+                " endpoint TEXT NOT NULL,"
+                " created_at REAL NOT NULL,"
+                " accessed_at REAL NOT NULL DEFAULT 0,"
+                " size INTEGER NOT NULL DEFAULT 0,"
+                " cache_key TEXT,"
+                " subject TEXT,"
+                " page INTEGER,"
+                " value BLOB NOT NULL"
+                ") WITHOUT ROWID"
+            )
+            # 兼容早期创建的数据库（没有 accessed_at/size 列）
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(api_cache)")}
+            if 'accessed_at' not in columns:
+                self._conn.execute("ALTER TABLE api_cache ADD COLUMN accessed_at REAL NOT NULL DEFAULT 0")
+                self._conn.execute("UPDATE api_cache SET accessed_at = created_at")
+            if 'size' not in columns:
+                self._conn.execute("ALTER TABLE api_cache ADD COLUMN size INTEGER NOT NULL DEFAULT 0")
+                self._conn.execute("UPDATE api_cache SET size = length(value)")
+            if 'cache_key' not in columns:
+                # 早期的条目没有保存原始缓存键，遍历时 key 为 None
+                self._conn.execute("ALTER TABLE api_cache ADD COLUMN cache_key TEXT")
+            if 'subject' not in columns:
+                # 二级索引列：企业标识和页码，从已保存的缓存键中回填（更早的条目没有缓存键，无法回填）
+                self._conn.execute("ALTER TABLE api_cache ADD COLUMN subject TEXT")
+                self._conn.execute("ALTER TABLE api_cache ADD COLUMN page INTEGER")
+                self._backfill_index()
+            # (endpoint, created_at) 复合索引同时支持按接口查询和按接口的过期范围删除
+            self._conn.execute("DROP INDEX IF EXISTS idx_api_cache_endpoint")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_api_cache_endpoint_created_at"
+                               " ON api_cache(endpoint, created_at)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_api_cache_created_at ON api_cache(created_at)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_api_cache_accessed_at ON api_cache(accessed_at)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_api_cache_subject ON api_cache(subject, endpoint)")
+
+    def _backfill_index(self):
+        last_hash = ''
+        while True:
+            rows = self._conn.execute(
+                "SELECT key_hash, cache_key FROM api_cache WHERE key_hash > ? AND cache_key IS NOT NULL"
+                " ORDER BY key_hash LIMIT ?", (last_hash, BATCH_SIZE)).fetchall()
+            if not rows:
+                return
+            last_hash = rows[-1][0]
+            self._conn.executemany("UPDATE api_cache SET subject = ?, page = ? WHERE key_hash = ?",
+                                   [(*index_fields(key)[1:], key_hash) for key_hash, key in rows])
+
+    @staticmethod
+    def _row(key: str, data: bytes, timestamp: Optional[float], now: float) -> tuple:
+        endpoint, subject, page = index_fields(key)
+        return hash_key(key), endpoint, subject, page, timestamp or now, now, len(data), key, data
+
+    @staticmethod
+    def _hash_row(key_hash: str, data: bytes, timestamp: Optional[float], now: float) -> tuple:
+        # 没有缓存键的条目接口路径未知，endpoint 为空字符串，按最长保留期清理
+        return key_hash, '', None, None, timestamp or now, now, len(data), None, data
+
+    def lookup(self, key: str, max_stale: float = 0) -> Optional[Tuple[Any, float]]:
+        key_hash = hash_key(key)
+        endpoint = endpoint_of(key)
+        started = time.perf_counter()
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT created_at, value FROM api_cache WHERE key_hash = ?", (key_hash,)
+            ).fetchone()
+            if row is None:
+                self._stats.record(endpoint, misses=1, read_seconds=time.perf_counter() - started)
+                return None
+            created_at, value = row
+            age = now - created_at
+            ttl = self.ttl_policy.ttl_for(endpoint)
+            if age >= ttl + max_stale:
+                expired = age >= self.ttl_policy.retention_for(endpoint)
+                if expired:
+                    # 超过保留期则删除缓存条目
+                    self._delete_locked(key_hash)
+                self._stats.record(endpoint, misses=1, expirations=int(expired),
+                                   read_seconds=time.perf_counter() - started)
+                return None
+            if self._bounded and self.eviction == 'lru':
+                self._conn.execute("UPDATE api_cache SET accessed_at = ? WHERE key_hash = ?", (now, key_hash))
+        try:
+            result = decode(value, lazy=self.lazy_values), created_at
+        except (ValueError, TypeError):
+            # 如果解析出错，删除可能损坏的缓存条目
+            self.delete(key)
+            self._stats.record(endpoint, misses=1, corrupt=1, read_seconds=time.perf_counter() - started)
+            return None
+        self._stats.record(endpoint, hits=1, stale_hits=int(age >= ttl), bytes_read=len(value),
+                           read_seconds=time.perf_counter() - started)
+        return result
+
+    def set(self, key: str, value: Any, timestamp: float = None):
+        started = time.perf_counter()
+        data = self.codec.encode(value)
+        now = time.time()
+        row = self._row(key, data, timestamp, now)
+        key_hash, endpoint = row[0], row[1]
+        with self._lock, self._transaction():
+            if self._bounded:
+                old = self._conn.execute("SELECT size FROM api_cache WHERE key_hash = ?", (key_hash,)).fetchone()
+                self._entries += 0 if old else 1
+                self._bytes += len(data) - (old[0] if old else 0)
+            self._conn.execute(_INSERT_SQL, row)
+            if self._bounded and self._over_budget():
+                self._evict()
+        self._stats.record(endpoint, writes=1, bytes_written=len(data), write_seconds=time.perf_counter() - started)
+
+    def bulk_get(self, keys: Iterable[str], max_stale: float = 0) -> Dict[str, Tuple[Any, float]]:
+        """按 BATCH_SIZE 分批，每批一次 IN 查询"""
+        keys = list(dict.fromkeys(keys))
+        result = {}
+        for i in range(0, len(keys), BATCH_SIZE):
+            batch = {hash_key(key): key for key in keys[i:i + BATCH_SIZE]}
+            started = time.perf_counter()
+            now = time.time()
+            placeholders = ','.join('?' * len(batch))
+            with self._lock:
+                rows = self._conn.execute(
+                    f"SELECT key_hash, created_at, value FROM api_cache WHERE key_hash IN ({placeholders})",
+                    tuple(batch)).fetchall()
+                found = {}
+                for key_hash, created_at, value in rows:
+                    key = batch[key_hash]
+                    endpoint = endpoint_of(key)
+                    age = now - created_at
+                    if age < self.ttl_policy.ttl_for(endpoint) + max_stale:
+                        found[key] = (created_at, value, age)
+                    elif age >= self.ttl_policy.retention_for(endpoint):
+                        self._delete_locked(key_hash)
+                        self._stats.record(endpoint, expirations=1)
+                if found and self._bounded and self.eviction == 'lru':
+                    self._conn.executemany("UPDATE api_cache SET accessed_at = ? WHERE key_hash = ?",
+                                           [(now, hash_key(key)) for key in found])
+            elapsed = (time.perf_counter() - started) / len(batch)
+            for key in batch.values():
+                endpoint = endpoint_of(key)
+                if key not in found:
+                    self._stats.record(endpoint, misses=1, read_seconds=elapsed)
+                    continue
+                created_at, value, age = found[key]
+                try:
+                    result[key] = decode(value, lazy=self.lazy_values), created_at
+                except (ValueError, TypeError):
+                    self.delete(key)
+                    self._stats.record(endpoint, misses=1, corrupt=1, read_seconds=elapsed)
+                    continue
+                self._stats.record(endpoint, hits=1, stale_hits=int(age >= self.ttl_policy.ttl_for(endpoint)),
+                                   bytes_read=len(value), read_seconds=elapsed)
+        return result
+
+    def bulk_set(self, items: BulkItems, timestamp: float = None):
+        """所有条目在一个写事务中写入"""
+        started = time.perf_counter()
+        now = time.time()
+        self._write_rows([self._row(key, self.codec.encode(value), item_timestamp, now)
+                          for key, value, item_timestamp in iter_bulk_items(items, timestamp)], started)
+
+    def set_by_hash(self, key_hash: str, value: Any, timestamp: float = None):
+        self.bulk_set_by_hash([(key_hash, value, timestamp)])
+
+    def bulk_set_by_hash(self, items: Iterable[Tuple[str, Any, Optional[float]]]):
+        """没有缓存键的条目（cache_key 为 NULL），所有条目在一个写事务中写入"""
+        started = time.perf_counter()
+        now = time.time()
+        self._write_rows([self._hash_row(key_hash, self.codec.encode(value), timestamp, now)
+                          for key_hash, value, timestamp in items], started)
+
+    def _write_rows(self, rows: list, started: float):
+        if not rows:
+            return
+        with self._lock, self._transaction():
+            if self._bounded:
+                self._account_rows(rows)
+            self._conn.executemany(_INSERT_SQL, rows)
+            if self._bounded and self._over_budget():
+                self._evict()
+        elapsed = (time.perf_counter() - started) / len(rows)
+        for row in rows:
+            self._stats.record(row[1], writes=1, bytes_written=row[6], write_seconds=elapsed)
+
+    def _account_rows(self, rows: list):
+        """
+        按被覆盖条目的原大小增量更新运行计数，与 set 相同，不必每批写入都全表统计；调用方需持有锁
+        """
+        sizes = {}
+        key_hashes = list({row[0] for row in rows})
+        for i in range(0, len(key_hashes), BATCH_SIZE):
+            batch = key_hashes[i:i + BATCH_SIZE]
+            placeholders = ','.join('?' * len(batch))
+            sizes.update(self._conn.execute(
+                f"SELECT key_hash, size FROM api_cache WHERE key_hash IN ({placeholders})", batch).fetchall())
+        for row in rows:
+            # 同一批中重复的键以最后一次写入为准
+            old_size = sizes.get(row[0])
+            self._entries += 0 if old_size is not None else 1
+            self._bytes += row[6] - (old_size or 0)
+            sizes[row[0]] = row[6]
+
+    @contextmanager
+    def _transaction(self):
+        """
+        显式写事务（BEGIN IMMEDIATE），写入和随后的淘汰要么全部生效要么全部回滚；
+        多个进程共享同一数据库时由 SQLite 的文件锁串行化写入，读取不受影响（WAL）
+        """
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._conn.execute("COMMIT")
+
+    def delete(self, key: str):
+        with self._lock:
+            self._delete_locked(hash_key(key))
+
+    def _delete_locked(self, key_hash: str):
+        if self._bounded:
+            row = self._conn.execute("SELECT size FROM api_cache WHERE key_hash = ?", (key_hash,)).fetchone()
+            if row:
+                self._entries -= 1
+                self._bytes -= row[0]
+        self._conn.execute("DELETE FROM api_cache WHERE key_hash = ?", (key_hash,))
+
+    def _refresh_totals(self):
+        self._entries, self._bytes = self._conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM api_cache").fetchone()
+
+    def _over_budget(self) -> bool:
+        return ((self.max_entries is not None and self._entries > self.max_entries)
+                or (self.max_bytes is not None and self._bytes > self.max_bytes))
+
+    def purge_expired(self) -> int:
+        """
+        通过索引范围删除所有过期条目，单独配置了过期时间的接口各执行一次范围删除
+        :return: 删除的条目数
+        """
+        now = time.time()
+        deleted = 0
+        with self._lock:
+            grace = self.ttl_policy.stale_grace
+            # 接口路径未知（endpoint 为空）的条目按最长保留期清理
+            for endpoint, ttl in [*self.ttl_policy.per_path.items(), ('', self.ttl_policy.max_ttl)]:
+                cursor = self._conn.execute("DELETE FROM api_cache WHERE endpoint = ? AND created_at < ?",
+                                            (endpoint, now - ttl - grace))
+                deleted += cursor.rowcount
+            endpoints = [*self.ttl_policy.per_path, '']
+            placeholders = ','.join('?' * len(endpoints))
+            cursor = self._conn.execute(
+                f"DELETE FROM api_cache WHERE created_at < ? AND endpoint NOT IN ({placeholders})",
+                (now - self.ttl_policy.default - grace, *endpoints))
+            deleted += cursor.rowcount
+            if self._bounded:
+                self._refresh_totals()
+            return deleted
+
+    def _evict(self) -> int:
+        """超出容量上限时按淘汰策略删除条目，调用方需持有锁"""
+        self._refresh_totals()
+        order_column = 'accessed_at' if self.eviction == 'lru' else 'created_at'
+        evicted = 0
+        if self.max_entries is not None and self._entries > self.max_entries:
+            excess = self._entries - int(self.max_entries * EVICT_LOW_WATERMARK)
+            cursor = self._conn.execute(
+                f"DELETE FROM api_cache WHERE key_hash IN"
+                f" (SELECT key_hash FROM api_cache ORDER BY {order_column} LIMIT ?)", (excess,))
+            evicted += cursor.rowcount
+            self._refresh_totals()
+        if self.max_bytes is not None and self._bytes > self.max_bytes:
+            excess = self._bytes - int(self.max_bytes * EVICT_LOW_WATERMARK)
+            # 按淘汰顺序累加条目大小，删除累计量达到超出部分之前的所有条目
+            cursor = self._conn.execute(
+                f"DELETE FROM api_cache WHERE key_hash IN"
+                f" (SELECT key_hash FROM (SELECT key_hash, size,"
+                f"   SUM(size) OVER (ORDER BY {order_column} ROWS UNBOUNDED PRECEDING) AS cumulative"
+                f"   FROM api_cache) WHERE cumulative - size < ?)", (excess,))
+            evicted += cursor.rowcount
+            self._refresh_totals()
+        return evicted
+
+    def list_entries(self, subject: str = None, subject_prefix: str = None, api_path: str = None,
+                     include_expired: bool = False) -> Iterator[IndexEntry]:
+        """通过 (subject, endpoint) 索引查询，不读取缓存值"""
+        where, params = index_where(subject, subject_prefix, api_path)
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT subject, endpoint, page, cache_key, created_at FROM api_cache WHERE {where}"
+                f" ORDER BY subject, endpoint, page", params).fetchall()
+        now = time.time()
+        for subject, endpoint, page, key, created_at in rows:
+            if include_expired or now - created_at < self.ttl_policy.retention_for(endpoint):
+                yield IndexEntry(subject, endpoint, page, key, created_at)
+
+    def invalidate(self, subject: str = None, api_path: str = None) -> int:
+        if subject is None and api_path is None:
+            raise ValueError("subject 和 api_path 至少指定一个")
+        where, params = index_where(subject, None, api_path)
+        with self._lock:
+            deleted = self._conn.execute(f"DELETE FROM api_cache WHERE {where}", params).rowcount
+            if self._bounded:
+                self._refresh_totals()
+        return deleted
+
+    def iterate(self, include_expired: bool = False) -> Iterator[CacheEntry]:
+        """按 key_hash 分批读取，每批只在读取时持有锁，遍历过程中可以正常读写"""
+        last_hash = ''
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT key_hash, cache_key, created_at, value FROM api_cache"
+                    " WHERE key_hash > ? ORDER BY key_hash LIMIT ?", (last_hash, BATCH_SIZE)).fetchall()
+            if not rows:
+                return
+            last_hash = rows[-1][0]
+            now = time.time()
+            for key_hash, key, created_at, value in rows:
+                if not include_expired and self._is_expired(key, created_at, now):
+                    continue
+                try:
+                    value = decode(value, lazy=self.lazy_values)
+                except (ValueError, TypeError):
+                    continue
+                yield CacheEntry(key, key_hash, created_at, value)
+
+    def verify(self, repair: bool = False, workers: int = 1) -> dict:
+        """
+        按 key_hash 分批读取并解码所有条目校验，校验失败的条目每批在一个事务中删除
+        无法解码、key_hash 与缓存键的MD5不一致、已超过保留期的条目校验失败
+        :param repair: 是否删除校验失败的条目
+        :param workers: 忽略，SQLite 的读写由一个连接串行执行
+        """
+        result = dict.fromkeys(VERIFY_FIELDS, 0)
+        now = time.time()
+        last_hash = ''
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT key_hash, cache_key, created_at, size, value FROM api_cache"
+                    " WHERE key_hash > ? ORDER BY key_hash LIMIT ?", (last_hash, BATCH_SIZE)).fetchall()
+            if not rows:
+                break
+            last_hash = rows[-1][0]
+            failed = []
+            for key_hash, key, created_at, size, value in rows:
+                result['checked'] += 1
+                try:
+                    decode(value)
+                except (ValueError, TypeError):
+                    status = 'corrupt'
+                else:
+                    if key is not None and hash_key(key) != key_hash:
+                        status = 'mismatched'
+                    elif self._is_expired(key, created_at, now):
+                        status = 'expired'
+                    else:
+                        status = 'valid'
+                result[status] += 1
+                if status != 'valid':
+                    failed.append((key_hash, size))
+            if repair and failed:
+                with self._lock, self._transaction():
+                    for key_hash, _ in failed:
+                        self._delete_locked(key_hash)
+                result['removed'] += len(failed)
+                result['reclaimed_bytes'] += sum(size for _, size in failed)
+        return result
+
+    def compact(self) -> dict:
+        """
+        批量清理：删除所有过期条目，并把缓存淘汰到容量上限以内
+        :return: 清理结果统计
+        """
+        with self._lock:
+            self._refresh_totals()
+            bytes_before = self._bytes
+        expired = self.purge_expired()
+        with self._lock:
+            evicted = self._evict() if self._bounded else 0
+            self._refresh_totals()
+            return {'expired': expired, 'evicted': evicted, 'reclaimed_bytes': bytes_before - self._bytes,
+                    'entries': self._entries, 'bytes': self._bytes}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
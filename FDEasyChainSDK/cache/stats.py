@@ -0,0 +1,71 @@
+# _*_ codign:utf8 _*_
+"""====================================
+@Author:Sadam·Sadik
+@Email：1903249375@qq.com
+@Date：2026/10/18
+@Software: PyCharm
+@disc: 缓存统计
+======================================="""
+import threading
+from collections import defaultdict
+from typing import Dict
+
+STAT_FIELDS = (
+    'hits',  # 命中（含陈旧命中）
+    'stale_hits',  # 已过期但在 stale-while-revalidate 窗口内的命中
+    'misses',  # 未命中（含过期、损坏）
+    'expirations',  # 读取时发现过期并删除的条目
+    'corrupt',  # 读取时发现损坏并删除的条目
+    'writes',
+    'bytes_read',
+    'bytes_written',
+    'read_seconds',  # 读取累计耗时
+    'write_seconds',  # 写入累计耗时
+)
+
+
+class CacheStats:
+    """
+    按接口路径分别统计的缓存计数器，线程安全
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._by_path: Dict[str, Dict[str, float]] = defaultdict(lambda: dict.fromkeys(STAT_FIELDS, 0))
+
+    def record(self, api_path: str, **deltas):
+        """
+        累加计数，如 record('/company_basic_query/', hits=1, bytes_read=1024, read_seconds=0.001)
+        """
+        with self._lock:
+            counters = self._by_path[api_path]
+            for field, delta in deltas.items():
+                counters[field] += delta
+
+    def reset(self):
+        with self._lock:
+            self._by_path.clear()
+
+    @staticmethod
+    def _with_derived(counters: Dict[str, float]) -> Dict[str, float]:
+        result = dict(counters)
+        lookups = counters['hits'] + counters['misses']
+        result['hit_rate'] = counters['hits'] / lookups if lookups else 0.0
+        result['avg_read_ms'] = counters['read_seconds'] * 1000 / lookups if lookups else 0.0
+        result['avg_write_ms'] = counters['write_seconds'] * 1000 / counters['writes'] if counters['writes'] else 0.0
+        return result
+
+    def snapshot(self) -> dict:
+        """
+        :return: {'total': 汇总计数, 'by_path': {接口路径: 计数}}，另附命中率和平均读写耗时
+        """
+        with self._lock:
+            by_path = {path: dict(counters) for path, counters in self._by_path.items()}
+        total = dict.fromkeys(STAT_FIELDS, 0)
+        for counters in by_path.values():
+            for field in STAT_FIELDS:
+                total[field] += counters[field]
+        return {
+            'total': self._with_derived(total),
+            'by_path': {path: self._with_derived(counters) for path, counters in sorted(by_path.items())},
+        }
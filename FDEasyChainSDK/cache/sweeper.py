@@ -0,0 +1,49 @@
+# _*_ codign:utf8 _*_
+"""====================================
+@Author:Sadam·Sadik
+@Email：1903249375@qq.com
+@Date：2026/10/18
+@Software: PyCharm
+@disc: 后台定期清理缓存
+======================================="""
+import logging
+import threading
+
+
+class CacheSweeper:
+    """
+    后台清理线程，定期调用缓存的 compact() 批量删除过期条目并执行容量淘汰
+    """
+
+    def __init__(self, cache, interval: float = 3600):
+        """
+        :param cache: 实现了 compact() 的缓存对象
+        :param interval: 清理间隔（秒），默认1小时
+        """
+        self.cache = cache
+        self.interval = interval
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="FDEasyChainCacheSweeper", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = None):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self):
+        while True:
+            try:
+                result = self.cache.compact()
+                logging.info(f"(缓存清理) {result}")
+            except Exception as e:
+                logging.error(f"(缓存清理失败) {e}")
+            if self._stop_event.wait(self.interval):
+                break
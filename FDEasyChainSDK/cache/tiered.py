@@ -0,0 +1,130 @@
+# _*_ codign:utf8 _*_
+"""====================================
+@Author:Sadam·Sadik
+@Email：1903249375@qq.com
+@Date：2026/10/18
+@Software: PyCharm
+@disc: 多级缓存
+======================================="""
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .base import BulkItems, CacheBackend, CacheEntry, iter_bulk_items
+from .keys import IndexEntry
+
+
+class TieredCache(CacheBackend):
+    """
+    多级缓存，按顺序逐级查找（如 内存 -> 磁盘 -> 快照）
+    下层命中时会把条目提升到上层；写入时写穿所有层级。每一层分别统计自己的命中/未命中次数。
+    最后一个可写层级是主层级，保存全部新写入的条目；只读层级（快照）放在主层级之后，
+    主层级中的新值总是优先于快照中的旧值，快照命中只提升到主层级之前的层级（内存），不复制到主层级。
+    """
+
+    def __init__(self, tiers: List[CacheBackend]):
+        if not tiers:
+            raise ValueError("至少需要一个缓存层级")
+        writable = [i for i, tier in enumerate(tiers) if not tier.read_only]
+        if not writable:
+            raise ValueError("至少需要一个可写的缓存层级")
+        super().__init__()
+        self.tiers = tiers
+        self._primary_index = writable[-1]
+        # 过期策略、遍历和索引以主层级为准
+        self.primary = tiers[self._primary_index]
+        self.ttl_policy = self.primary.ttl_policy
+
+    @property
+    def lazy_values(self) -> bool:
+        return self.primary.lazy_values
+
+    @lazy_values.setter
+    def lazy_values(self, value: bool):
+        for tier in self.tiers:
+            tier.lazy_values = value
+
+    def lookup(self, key: str, max_stale: float = 0) -> Optional[Tuple[Any, float]]:
+        for i, tier in enumerate(self.tiers):
+            entry = tier.lookup(key, max_stale=max_stale)
+            if entry:
+                value, timestamp = entry
+                for upper in self._promote_to(i):
+                    upper.set(key, value, timestamp=timestamp)
+                return entry
+        return None
+
+    def _promote_to(self, i: int) -> List[CacheBackend]:
+        """第 i 层命中时需要提升到的层级；只读层级的命中不写入主层级"""
+        if self.tiers[i].read_only:
+            return [tier for tier in self.tiers[:min(i, self._primary_index)] if not tier.read_only]
+        return [tier for tier in self.tiers[:i] if not tier.read_only]
+
+    def set(self, key: str, value: Any, timestamp: float = None):
+        for tier in self.tiers:
+            tier.set(key, value, timestamp=timestamp)
+
+    def bulk_get(self, keys: Iterable[str], max_stale: float = 0) -> Dict[str, Tuple[Any, float]]:
+        """逐层批量查找，上一层未命中的键交给下一层；下层命中的条目批量提升到上层"""
+        result = {}
+        pending = list(dict.fromkeys(keys))
+        for i, tier in enumerate(self.tiers):
+            if not pending:
+                break
+            found = tier.bulk_get(pending, max_stale=max_stale)
+            if not found:
+                continue
+            for upper in self._promote_to(i):
+                upper.bulk_set([(key, value, timestamp) for key, (value, timestamp) in found.items()])
+            result.update(found)
+            pending = [key for key in pending if key not in found]
+        return result
+
+    def bulk_set(self, items: BulkItems, timestamp: float = None):
+        items = list(iter_bulk_items(items, timestamp))
+        for tier in self.tiers:
+            tier.bulk_set(items, timestamp=timestamp)
+
+    def delete(self, key: str):
+        for tier in self.tiers:
+            tier.delete(key)
+
+    def iterate(self, include_expired: bool = False) -> Iterator[CacheEntry]:
+        """上层只是主层级的子集，遍历主层级即可"""
+        return self.primary.iterate(include_expired=include_expired)
+
+    def list_entries(self, subject: str = None, subject_prefix: str = None, api_path: str = None,
+                     include_expired: bool = False) -> Iterator[IndexEntry]:
+        return self.primary.list_entries(subject, subject_prefix, api_path, include_expired)
+
+    def invalidate(self, subject: str = None, api_path: str = None) -> int:
+        """每一层都执行失效，返回主层级删除的条目数"""
+        deleted = 0
+        for tier in self.tiers:
+            count = tier.invalidate(subject, api_path)
+            if tier is self.primary:
+                deleted = count
+        return deleted
+
+    def compact(self) -> Dict[str, dict]:
+        """
+        依次清理每一层缓存
+        :return: {层级名称: 清理结果统计}
+        """
+        return {name: tier.compact() for name, tier in zip(self._tier_names(), self.tiers)}
+
+    def _tier_names(self) -> List[str]:
+        return [f"{i}:{type(tier).__name__}" for i, tier in enumerate(self.tiers)]
+
+    def stats(self) -> Dict[str, dict]:
+        """
+        每一层的读写统计
+        :return: {层级名称: 统计快照}
+        """
+        return {name: tier.stats() for name, tier in zip(self._tier_names(), self.tiers)}
+
+    def reset_stats(self):
+        for tier in self.tiers:
+            tier.reset_stats()
+
+    def close(self):
+        for tier in self.tiers:
+            tier.close()
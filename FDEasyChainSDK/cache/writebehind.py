@@ -0,0 +1,172 @@
+# _*_ codign:utf8 _*_
+"""====================================
+@Author:Sadam·Sadik
+@Email：1903249375@qq.com
+@Date：2026/10/18
+@Software: PyCharm
+@disc: 异步批量写入（write-behind）
+======================================="""
+import atexit
+import logging
+import queue
+import threading
+import time
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from .base import BulkItems, CacheBackend, CacheEntry, iter_bulk_items
+from .keys import IndexEntry
+from .lazy import LazyJSON, dump_json, load_json
+
+
+class WriteBehindCache(CacheBackend):
+    """
+    异步批量写入的缓存包装
+    set 只把条目放入待写队列后立即返回，由后台线程攒批后调用底层后端的 bulk_set 写入
+    （SQLite 为一个写事务，文件缓存为一组文件写入）。
+    同一个键在写入前被多次 set 时只写最后一次；读取会先查待写条目，保证写后立即可读。
+    set 在调用线程中把值序列化为JSON字节再入队，调用方之后修改返回给它的对象不会影响写入的内容。
+    队列满时 set 阻塞，直到后台线程腾出空间；进程退出时自动把待写条目全部写完。
+    """
+
+    def __init__(self, backend: CacheBackend, max_queue: int = 10000, batch_size: int = 500,
+                 flush_interval: float = 0.5):
+        """
+        :param backend: 实际存储缓存的后端
+        :param max_queue: 待写条目数上限，超出时 set 阻塞（背压）
+        :param batch_size: 每批最多写入的条目数
+        :param flush_interval: 攒批的最长等待时间（秒）
+        """
+        super().__init__()
+        self.backend = backend
+        self.ttl_policy = backend.ttl_policy
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue(maxsize=max_queue)
+        # key -> (JSON字节, timestamp)，队列中只保存键，同一个键的多次写入合并为一次
+        self._pending: Dict[str, Tuple[bytes, float]] = {}
+        # 已在队列中、尚未被后台线程取出的键
+        self._queued = set()
+        self._pending_lock = threading.Lock()
+        self._closed = False
+        self._worker = threading.Thread(target=self._run, name='FDEasyChainCacheWriter', daemon=True)
+        self._worker.start()
+        atexit.register(self.close)
+
+    @property
+    def lazy_values(self) -> bool:
+        return self.backend.lazy_values
+
+    @lazy_values.setter
+    def lazy_values(self, value: bool):
+        self.backend.lazy_values = value
+
+    def lookup(self, key: str, max_stale: float = 0) -> Optional[Tuple[Any, float]]:
+        with self._pending_lock:
+            pending = self._pending.get(key)
+        if pending is not None:
+            raw, timestamp = pending
+            return load_json(raw, lazy=self.lazy_values), timestamp
+        return self.backend.lookup(key, max_stale=max_stale)
+
+    def set(self, key: str, value: Any, timestamp: float = None):
+        if self._closed:
+            self.backend.set(key, value, timestamp=timestamp)
+            return
+        with self._pending_lock:
+            self._pending[key] = (dump_json(value), timestamp or time.time())
+            if key in self._queued:
+                return
+            self._queued.add(key)
+        self._queue.put(key)
+
+    def bulk_set(self, items: BulkItems, timestamp: float = None):
+        for key, value, item_timestamp in iter_bulk_items(items, timestamp):
+            self.set(key, value, timestamp=item_timestamp)
+
+    def delete(self, key: str):
+        with self._pending_lock:
+            self._pending.pop(key, None)
+        self.backend.delete(key)
+
+    def _run(self):
+        while True:
+            key = self._queue.get()
+            if key is None:
+                self._queue.task_done()
+                return
+            keys = [key]
+            deadline = time.monotonic() + self.flush_interval
+            while len(keys) < self.batch_size:
+                try:
+                    key = self._queue.get(timeout=max(deadline - time.monotonic(), 0))
+                except queue.Empty:
+                    break
+                if key is None:
+                    # 停止信号放回队列，写完这一批后退出
+                    self._queue.task_done()
+                    self._queue.put(None)
+                    break
+                keys.append(key)
+            self._write_batch(keys)
+            for _ in keys:
+                self._queue.task_done()
+
+    def _write_batch(self, keys: list):
+        with self._pending_lock:
+            # 取出之后再 set 的键重新入队；写入前已被删除的键不再写入
+            self._queued.difference_update(keys)
+            entries = [(key, self._pending[key]) for key in keys if key in self._pending]
+        if not entries:
+            return
+        try:
+            # LazyJSON 包装原始字节，JSON类编码直接写入，不再序列化
+            self.backend.bulk_set([(key, LazyJSON(raw), timestamp) for key, (raw, timestamp) in entries])
+        except Exception as e:
+            logging.error(f"(缓存批量写入失败) {len(entries)} 个条目: {e}")
+        with self._pending_lock:
+            for key, entry in entries:
+                # 写入期间又被 set 的键保留，等待下一批
+                if self._pending.get(key) is entry:
+                    del self._pending[key]
+
+    @property
+    def pending(self) -> int:
+        """待写条目数"""
+        return len(self._pending)
+
+    def flush(self):
+        """阻塞直到所有待写条目写入底层后端"""
+        self._queue.join()
+
+    def iterate(self, include_expired: bool = False) -> Iterator[CacheEntry]:
+        self.flush()
+        return self.backend.iterate(include_expired=include_expired)
+
+    def list_entries(self, subject: str = None, subject_prefix: str = None, api_path: str = None,
+                     include_expired: bool = False) -> Iterator[IndexEntry]:
+        self.flush()
+        return self.backend.list_entries(subject, subject_prefix, api_path, include_expired)
+
+    def invalidate(self, subject: str = None, api_path: str = None) -> int:
+        self.flush()
+        return self.backend.invalidate(subject, api_path)
+
+    def compact(self) -> dict:
+        self.flush()
+        return self.backend.compact()
+
+    def stats(self) -> dict:
+        return self.backend.stats()
+
+    def reset_stats(self):
+        self.backend.reset_stats()
+
+    def close(self):
+        """写完所有待写条目后停止后台线程并关闭底层后端，可重复调用"""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._worker.join()
+        atexit.unregister(self.close)
+        self.backend.close()
@@ -6,115 +6,524 @@
 @Software: PyCharm
 @disc:
 ======================================="""
-import hashlib
+import contextvars
+import itertools
 import json
 import logging
 import os
+import threading
 import time
-from pathlib import Path
-from typing import Any
-import requests
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Iterable, Iterator, Tuple, Union
 
-from FDEasyChainSDK.exceptions import create_exception
+import requests
+from requests.adapters import HTTPAdapter
+
+from FDEasyChainSDK.cache import APICache, CacheBackend, CacheSweeper, MemoryCache, SQLiteCache, TieredCache, \
+    LazyJSON, RemoteCache, SnapshotCache, TTLPolicy, WriteBehindCache, parse_envelope
+from FDEasyChainSDK.cache.negative import is_negative_entry, make_negative_entry, negative_entry_expired
+from FDEasyChainSDK.deadline import remaining as deadline_remaining
+from FDEasyChainSDK.exceptions import EasyChainException, NotFoundError, create_exception
+from FDEasyChainSDK.ratelimit import RateLimiter
+from FDEasyChainSDK.retry import RetryPolicy, parse_retry_after
+from FDEasyChainSDK.singleflight import SingleFlight
 from FDEasyChainSDK.utils import calculate_sign, generate_timestamp
 
 
-class APICache:
-    def __init__(self, expire_seconds: int = 30 * 24 * 3600):  # 默认30天
-        self.expire_seconds = expire_seconds
-        # 在用户主目录下创建缓存目录
-        self.cache_dir = Path.home() / '.data-crawled' / 'FDEasyChain'
-        print("CacheDir:", self.cache_dir)
-        self.cache_dir.mkdir(exist_ok=True, parents=True)
+class _StaleFlag(int):
+    """
+    陈旧缓存命中标记，作为 (result, is_cached) 中的 is_cached 返回
+    真值等同于 True，原有的 `if is_cached:` 判断不受影响；需要区分时使用 `is_cached is STALE`
+    """
 
-    def _get_cache_file(self, key: str) -> Path:
-        # 使用MD5对缓存键进行哈希，避免文件名过长或包含特殊字符
-        key_hash = hashlib.md5(key.encode()).hexdigest()
-        return self.cache_dir / f"{key_hash}.json"
+    def __new__(cls):
+        return super().__new__(cls, 1)
 
-    def get(self, key: str) -> Any:
-        cache_file = self._get_cache_file(key)
-        if not cache_file.exists():
-            return None
+    def __repr__(self):
+        return 'STALE'
 
-        try:
-            with cache_file.open('r', encoding='utf-8') as f:
-                cache_data = json.load(f)
-                timestamp = cache_data['timestamp']
-                if time.time() - timestamp < self.expire_seconds:
-                    return cache_data['value']
-                else:
-                    # 过期则删除缓存文件
-                    cache_file.unlink(missing_ok=True)
-        except (json.JSONDecodeError, KeyError, OSError):
-            # 如果读取出错，删除可能损坏的缓存文件
-            cache_file.unlink(missing_ok=True)
-        return None
-
-    def set(self, key: str, value: Any):
-        cache_file = self._get_cache_file(key)
-        cache_data = {
-            'timestamp': time.time(),
-            'value': value
-        }
-        try:
-            with cache_file.open('w', encoding='utf-8') as f:
-                json.dump(cache_data, f, ensure_ascii=False, indent=2)
-        except OSError:
-            # 写入失败时，确保不会留下损坏的缓存文件
-            cache_file.unlink(missing_ok=True)
+
+STALE = _StaleFlag()
 
 
 # FiveDegreeEasyChain 5度易链
 class EasyChainCli:
-    def __init__(self, debug: bool = False, cache_expire_seconds: int = 30 * 24 * 3600):  # 默认30天
+    def __init__(self, debug: bool = False, cache_expire_seconds: int = 30 * 24 * 3600,  # 默认30天
+                 cache_backend: str = 'file', cache_db_path: str = None,
+                 memory_cache_entries: int = 0, memory_cache_bytes: int = 64 * 1024 * 1024,
+                 cache_codec: str = 'json', cache_max_bytes: int = None, cache_max_entries: int = None,
+                 cache_eviction: str = 'lru', cache_sweep_interval: float = None,
+                 cache_ttl_policy: dict = None, cache_layout: str = 'flat',
+                 negative_cache_expire_seconds: int = 0, cache_lock: bool = False,
+                 stale_while_revalidate: int = 0, refresh_workers: int = 4, cache: CacheBackend = None,
+                 cache_dedup: bool = False, cache_write_behind: bool = False, cache_write_queue: int = 10000,
+                 lazy_json: bool = False, cache_index: bool = False, cache_server: str = None,
+                 cache_snapshot: str = None, pool_connections: int = 4, pool_maxsize: int = 16,
+                 keep_alive: bool = True, rate_limit: Union[float, RateLimiter] = None, rate_limit_burst: int = 1,
+                 rate_limit_per_path: dict = None, rate_limit_dir: str = None, retry_policy: RetryPolicy = None,
+                 connect_timeout: float = 5, read_timeout: float = 60, coalesce_requests: bool = True):
+        """
+        :param debug: 是否开启调试模式
+        :param cache_expire_seconds: 缓存过期时间（秒），默认30天
+        :param cache_backend: 缓存存储方式，'file' 每个请求一个JSON文件，'sqlite' 单文件SQLite数据库，
+                              'memory' 仅进程内存（不落盘）
+        :param cache_db_path: SQLite缓存数据库路径，默认 ~/.data-crawled/FDEasyChain.sqlite3
+        :param memory_cache_entries: 内存缓存层最多保存的条目数，0 表示不启用内存缓存层
+        :param memory_cache_bytes: 内存缓存层占用的近似字节数上限，默认64MB
+        :param cache_codec: 缓存值的编码方式，可选 'json'(紧凑JSON)、'zlib'、'msgpack'、'zstd'，
+                            旧版本写入的缓存条目读取时自动兼容
+        :param cache_max_bytes: 磁盘缓存总字节数上限，None 表示不限制
+        :param cache_max_entries: 磁盘缓存条目数上限，None 表示不限制
+        :param cache_eviction: 超出上限时的淘汰策略，'lru' 最久未访问优先，'oldest' 最早写入优先
+        :param cache_sweep_interval: 后台清理线程的运行间隔（秒），None 表示不启动后台清理
+        :param cache_ttl_policy: 按接口路径单独配置的缓存过期时间（秒），如 {'/company_news_query/': 24 * 3600}，
+                                 未配置的接口使用 cache_expire_seconds；配置为 0 表示该接口不缓存
+        :param cache_layout: 文件缓存的目录布局，'flat' 平铺，'sharded' 两级分片子目录（适合千万级条目），
+                             已有的平铺缓存需先用 FDEasyChainSDK.cache.migrate_flat_to_sharded() 迁移
+        :param negative_cache_expire_seconds: “查无数据”(NotFoundError)结果的缓存时间（秒），
+                                              命中时重新抛出同类异常；0 表示不缓存此类结果
+        :param cache_lock: 文件缓存是否启用进程间咨询锁，多个采集进程共享同一缓存目录时建议开启
+        :param stale_while_revalidate: 缓存过期后仍可直接返回的时间窗口（秒）。窗口内的命中立即返回陈旧数据，
+                                       is_cached 为 STALE，同时在后台线程池中刷新；0 表示不启用
+        :param refresh_workers: 后台刷新线程数
+        :param cache: 自定义缓存后端（CacheBackend 的实例，如 RedisCache），传入时忽略 cache_backend 及其存储相关参数，
+                      过期时间以该后端的 ttl_policy 为准
+        :param cache_dedup: 文件缓存是否启用内容去重，相同的响应内容只在磁盘上保存一份
+        :param cache_write_behind: 是否异步批量写入缓存。请求返回前只把结果放入待写队列，由后台线程批量落盘，
+                                   进程退出时自动写完剩余条目
+        :param cache_write_queue: 异步写入的待写条目数上限，队列满时请求线程等待后台线程写入（背压）
+        :param lazy_json: 是否以 LazyJSON 返回接口数据。响应中 data 字段的原始字节直接写入缓存，
+                          命中缓存时不解析，首次按 dict/list 访问时才解析；转发数据时用 .raw 取原始字节
+        :param cache_index: 文件缓存是否维护企业标识/接口路径的二级索引，cached_dimensions()/invalidate()/list_cached()
+                            无需遍历缓存目录（SQLite缓存始终带索引）
+        :param cache_server: 本机缓存服务的 Unix socket 路径（python -m FDEasyChainSDK.cache.server 启动），
+                             指定后通过缓存服务读写缓存，忽略本地缓存相关参数；过期时间以缓存服务的配置为准
+                             （启动时的 --expire-seconds/--ttl-policy/--stale-grace）
+        :param cache_snapshot: 只读缓存快照文件路径（FDEasyChainSDK.cache.export_snapshot() 导出），
+                               作为磁盘缓存之后的只读层，磁盘缓存未命中时再查快照；新写入只进入磁盘缓存，
+                               并优先于快照中的同一条目
+        :param pool_connections: HTTP连接池缓存的主机连接池个数
+        :param pool_maxsize: 每个主机连接池保持的最大连接数，多线程并发请求时应不小于线程数
+        :param keep_alive: 是否复用连接（HTTP keep-alive）。复用时同一客户端的请求共享已建立的TCP+TLS连接，
+                           不再每次握手；False 时每个请求结束后关闭连接
+        :param rate_limit: 所有接口合计的每秒请求数上限（网关按 APPID 限速），None 表示不限制；
+                           也可以传入 RateLimiter 实例，在多个客户端之间共享限速。缓存命中不占用配额
+        :param rate_limit_burst: 允许的突发请求数，1 表示严格匀速
+        :param rate_limit_per_path: 按接口路径单独配置的每秒请求数上限，如 {'/company_news_query/': 5}
+        :param rate_limit_dir: 多进程共享限速的状态目录，同一台机器上使用同一目录的采集进程合计不超过上限
+        :param retry_policy: 请求失败时的重试策略（连接错误及 500/503 等可重试的错误码），默认最多尝试5次、
+                             指数退避加随机抖动；RetryPolicy(max_attempts=1) 表示不重试
+        :param connect_timeout: 建立连接的超时时间（秒）
+        :param read_timeout: 等待响应数据的超时时间（秒），超时后按重试策略重试，放弃时抛出 RequestTimeoutError；
+                             单次调用的总耗时用 FDEasyChainSDK.deadline() 限定
+        :param coalesce_requests: 是否合并相同的并发请求。多个线程同时请求同一接口、同一参数且未命中缓存时，
+                                  只有第一个实际调用网关，其余等待并共享它的结果或异常
+        """
         self.app_id = os.getenv("DATA_DO_WELL_API_KEY")
         self.app_secret = os.getenv("DATA_DO_WELL_API_SECRET")
         self.api_endpoint = "https://gateway.qyxqk.com/wdyl/openapi"
         self.debug = debug
-        self._cache = APICache(expire_seconds=cache_expire_seconds)
+        self.lazy_json = lazy_json
+        self.negative_cache_expire_seconds = negative_cache_expire_seconds
+        self.stale_while_revalidate = stale_while_revalidate
+        self.refresh_workers = refresh_workers
+        self.refresh_queue_size = refresh_workers * 16
+        self._refresh_executor = None
+        self._refresh_lock = threading.Lock()
+        self._refreshing = set()
+        # 所有请求共享一个会话，连接池中的连接在请求之间复用
+        self.pool_maxsize = pool_maxsize
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+        self._session.mount('https://', adapter)
+        self._session.mount('http://', adapter)
+        if not keep_alive:
+            self._session.headers['Connection'] = 'close'
+        self.retry_policy = retry_policy or RetryPolicy()
+        self._single_flight = SingleFlight() if coalesce_requests else None
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self._owns_rate_limiter = not isinstance(rate_limit, RateLimiter)
+        if isinstance(rate_limit, RateLimiter):
+            self._rate_limiter = rate_limit
+        elif rate_limit or rate_limit_per_path:
+            self._rate_limiter = RateLimiter(rate=rate_limit, burst=rate_limit_burst, per_path=rate_limit_per_path,
+                                             shared_dir=rate_limit_dir)
+        else:
+            self._rate_limiter = None
+        self._ttl_policy = TTLPolicy(default=cache_expire_seconds, per_path=cache_ttl_policy,
+                                     stale_grace=stale_while_revalidate)
+        if cache is None and cache_server:
+            # 缓存服务暂时不可用时先使用客户端的过期策略，连接成功后以服务端的配置为准
+            cache = RemoteCache(cache_server, expire_seconds=TTLPolicy(default=cache_expire_seconds,
+                                                                       per_path=cache_ttl_policy,
+                                                                       stale_grace=stale_while_revalidate))
+        if cache is not None:
+            if not isinstance(cache, CacheBackend):
+                raise TypeError(f"cache 必须是 CacheBackend 的实例: {type(cache).__name__}")
+            self._cache = cache
+            policy = cache.ttl_policy
+            if (cache_ttl_policy is not None and self._ttl_policy.per_path != policy.per_path) or \
+                    (stale_while_revalidate and stale_while_revalidate != policy.stale_grace):
+                # 过期时间由缓存后端（缓存服务）决定，客户端传入的配置不生效
+                logging.warning(f"cache_ttl_policy/stale_while_revalidate 与缓存后端的配置不一致，以缓存后端为准: {policy}")
+            self._ttl_policy = policy
+        elif cache_backend == 'sqlite':
+            self._cache = SQLiteCache(expire_seconds=self._ttl_policy, db_path=cache_db_path,
+                                      codec=cache_codec, max_bytes=cache_max_bytes,
+                                      max_entries=cache_max_entries, eviction=cache_eviction)
+        elif cache_backend == 'file':
+            self._cache = APICache(expire_seconds=self._ttl_policy, codec=cache_codec,
+                                   max_bytes=cache_max_bytes, max_entries=cache_max_entries,
+                                   eviction=cache_eviction, layout=cache_layout, lock=cache_lock,
+                                   dedup=cache_dedup, index=cache_index)
+        elif cache_backend == 'memory':
+            self._cache = MemoryCache(expire_seconds=self._ttl_policy, max_entries=cache_max_entries or 10000,
+                                      max_bytes=cache_max_bytes or memory_cache_bytes)
+        else:
+            raise ValueError(f"不支持的缓存存储方式: {cache_backend}")
+        if cache_write_behind:
+            self._cache = WriteBehindCache(self._cache, max_queue=cache_write_queue)
+        tiers = [self._cache]
+        if memory_cache_entries > 0:
+            # 在磁盘缓存前增加一层LRU内存缓存，同一批次内的重复查询不再访问文件系统
+            tiers.insert(0, MemoryCache(expire_seconds=self._ttl_policy, max_entries=memory_cache_entries,
+                                        max_bytes=memory_cache_bytes))
+        if cache_snapshot:
+            # 只读快照放在磁盘缓存之后，刷新后写入磁盘的新值不会被快照中的旧值遮住
+            tiers.append(SnapshotCache(cache_snapshot, expire_seconds=self._ttl_policy))
+        if len(tiers) > 1:
+            self._cache = TieredCache(tiers)
+        if lazy_json:
+            self._cache.lazy_values = True
+        self._cache_sweeper = None
+        if cache_sweep_interval:
+            self._cache_sweeper = CacheSweeper(self._cache, interval=cache_sweep_interval)
+            self._cache_sweeper.start()
+
+    def close(self):
+        """
+        释放客户端资源：关闭HTTP连接池，停止后台清理线程和刷新线程，关闭缓存（异步写入的待写条目会先写完）
+        也可以用 with EasyChainCli() as cli: 的方式在退出时自动关闭
+        """
+        if self._cache_sweeper is not None:
+            self._cache_sweeper.stop()
+            self._cache_sweeper = None
+        with self._refresh_lock:
+            executor, self._refresh_executor = self._refresh_executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+        self._session.close()
+        # 传入的 RateLimiter 可能由多个客户端共享，由调用方关闭
+        if self._rate_limiter is not None and self._owns_rate_limiter:
+            self._rate_limiter.close()
+        self._cache.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def batch(self, method: Union[str, Callable], keys: Iterable[str], workers: int = None,
+              **kwargs) -> Iterator[Tuple[str, object, bool, Exception]]:
+        """
+        并发调用同一个接口查询一批企业，按完成顺序逐个返回结果
+        请求在有界线程池中执行，共享同一个HTTP连接池；keys 按需读取，同时在途的请求数有上限，不会把整批加载到内存。
+        提前停止迭代时取消尚未开始的请求。
+        :param method: 接口方法，如 cli.company_basic_query，或方法名 'company_basic_query'
+        :param keys: 企业标识序列（可以是生成器）
+        :param workers: 并发线程数，默认等于连接池大小 pool_maxsize
+        :param kwargs: 传给接口方法的其他参数，如 page_size
+        :return: (key, 结果, is_cached, 异常) 迭代器；请求失败时结果为 None，异常为捕获到的异常，否则异常为 None
+        """
+        if isinstance(method, str):
+            method = getattr(self, method)
+        workers = workers or self.pool_maxsize
+        keys = iter(keys)
+        pending = {}
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="FDEasyChainBatch") as executor:
+            def submit(count: int):
+                for key in itertools.islice(keys, count):
+                    # 调用方设置的截止时间等上下文传递到工作线程
+                    pending[executor.submit(contextvars.copy_context().run, method, key, **kwargs)] = key
+
+            # 预先提交两倍线程数的请求，保证线程不空闲；之后每完成一个补充一个
+            submit(workers * 2)
+            try:
+                while pending:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        key = pending.pop(future)
+                        submit(1)
+                        try:
+                            result, is_cached = future.result()
+                        except Exception as e:
+                            yield key, None, False, e
+                        else:
+                            yield key, result, is_cached, None
+            finally:
+                for future in pending:
+                    future.cancel()
+
+    def retry_stats(self) -> dict:
+        """
+        重试统计快照：发送次数、重试次数、放弃次数、重试后成功次数、累计退避时间，按失败原因分别统计
+        """
+        return self.retry_policy.stats()
+
+    def coalesce_stats(self) -> dict:
+        """
+        合并请求统计快照：被合并（等待其他相同请求的结果、未实际调用网关）的调用次数；未启用合并时为 0
+        """
+        return {'coalesced': self._single_flight.coalesced if self._single_flight is not None else 0}
+
+    def cache_stats(self) -> dict:
+        """
+        缓存统计快照：命中/未命中/过期/损坏次数、读写字节数和耗时，按缓存层级和接口路径分别统计
+        :return: {层级名称: {'total': 汇总计数, 'by_path': {接口路径: 计数}}}
+        """
+        if isinstance(self._cache, TieredCache):
+            return self._cache.stats()
+        return {f"0:{type(self._cache).__name__}": self._cache.stats()}
+
+    def reset_cache_stats(self):
+        """清零缓存统计"""
+        self._cache.reset_stats()
+
+    def compact_cache(self) -> dict:
+        """
+        立即批量清理缓存：删除所有过期条目，并把缓存淘汰到容量上限以内
+        :return: 清理结果统计
+        """
+        return self._cache.compact()
+
+    def cached_dimensions(self, key: str) -> dict:
+        """
+        某个企业已缓存的接口及页码
+        :param key: 企业标识（企业id/企业完整名称/社会统一信用代码），与调用接口时传入的 key 一致
+        :return: {接口路径: [页码, ...]}，没有分页参数的接口页码为 None
+        """
+        return self._cache.cached_dimensions(key)
+
+    def invalidate(self, key: str = None, api_path: str = None) -> int:
+        """
+        批量删除缓存，如某个企业的数据更正后删除该企业的所有缓存
+        :param key: 企业标识，与调用接口时传入的 key 一致
+        :param api_path: 接口路径，如 '/company_basic_query/'；与 key 同时指定时只删除该企业在该接口的缓存
+        :return: 删除的条目数
+        """
+        return self._cache.invalidate(subject=key, api_path=api_path)
+
+    def list_cached(self, prefix: str = '', api_path: str = None) -> list:
+        """
+        按企业标识前缀列出缓存条目
+        :param prefix: 企业标识前缀，如统一社会信用代码的前几位；空字符串表示所有企业
+        :param api_path: 只列出该接口的缓存条目
+        :return: [IndexEntry(subject, api_path, page, key, timestamp)]
+        """
+        return list(self._cache.list_entries(subject_prefix=prefix, api_path=api_path))
+
+    def rebuild_cache_index(self) -> int:
+        """
+        重建文件缓存的二级索引（cache_index=True），对已有缓存目录首次开启索引时执行一次
+        启用内存缓存层或快照时重建磁盘缓存的索引；异步写入的待写条目先全部写入
+        :return: 索引的条目数
+        """
+        cache = self._cache
+        if isinstance(cache, TieredCache):
+            cache = cache.primary
+        if isinstance(cache, WriteBehindCache):
+            cache.flush()
+            cache = cache.backend
+        if not isinstance(cache, APICache):
+            raise RuntimeError(f"{type(cache).__name__} 不需要重建索引（只有文件缓存使用单独维护的索引）")
+        return cache.rebuild_index()
 
     def __calculate_sign__(self, payload: dict, timestamp):
         return calculate_sign(self.app_id, timestamp, self.app_secret, payload)
 
     def __post__(self, api_path, payload: dict):
-        url = self.api_endpoint + api_path
+        cache_key = self.__cache_key__(api_path, payload)
+        # 检查缓存，过期时间为 0 的接口不缓存
+        use_cache = self._ttl_policy.ttl_for(api_path) > 0
+        entry = self._cache.lookup(cache_key, max_stale=self.stale_while_revalidate) if use_cache else None
+        if entry is not None:
+            hit = self.__cache_hit__(api_path, payload, cache_key, entry)
+            if hit is not None:
+                return hit
+        return self.__fetch__(api_path, payload, cache_key, use_cache)
+
+    def __fetch__(self, api_path, payload: dict, cache_key: str, use_cache: bool):
+        """
+        调用网关接口；相同缓存键的并发调用合并为一次
+        """
+        if self._single_flight is None:
+            return self.__request__(api_path, payload, cache_key, use_cache)
+        return self._single_flight.do(cache_key, lambda: self.__request__(api_path, payload, cache_key, use_cache))
+
+    @staticmethod
+    def __cache_key__(api_path, payload: dict) -> str:
         # 标准化请求体，确保相同参数生成相同的缓存键
         try:
             # 将字典按键排序后重新序列化为JSON字符串，确保顺序一致性
             normalized_body = json.dumps(payload, sort_keys=True)
             # 生成缓存键
-            cache_key = f"{api_path}:{normalized_body}"
+            return f"{api_path}:{normalized_body}"
         except json.JSONDecodeError:
             # 如果请求体不是有效的JSON，就使用原始请求体
-            cache_key = f"{api_path}:{payload}"
-
-        # 检查缓存
-        cached_result = self._cache.get(cache_key)
-        if cached_result is not None:
-            logging.info(f"(缓存:Ok!) {url}")
-            return cached_result, True
+            return f"{api_path}:{payload}"
 
+    def __cache_hit__(self, api_path, payload: dict, cache_key: str, entry: tuple):
+        """
+        处理缓存命中：返回 (结果, is_cached)；负缓存命中时抛出同类异常；需要重新请求时返回 None
+        """
+        url = self.api_endpoint + api_path
+        cached_result, cached_at = entry
+        stale = time.time() - cached_at >= self._ttl_policy.ttl_for(api_path)
+        if is_negative_entry(cached_result):
+            if not stale and not negative_entry_expired(cached_result):
+                logging.info(f"(缓存:查无数据) {url}")
+                raise create_exception(status_code=cached_result['code'], message=cached_result['msg'])
+            return None
+        if self.lazy_json and not isinstance(cached_result, LazyJSON):
+            # 自定义后端可能返回已解析的值，统一包装，返回类型与缓存来源无关
+            cached_result = LazyJSON(value=cached_result)
+        if stale:
+            # 先返回陈旧数据，再在后台刷新
+            self.__schedule_refresh__(api_path, payload, cache_key)
+            logging.info(f"(缓存:Stale) {url}")
+            return cached_result, STALE
+        logging.info(f"(缓存:Ok!) {url}")
+        return cached_result, True
+
+    def __headers__(self, payload: dict) -> dict:
+        """网关要求的签名请求头"""
         timestamp = generate_timestamp()
         sign = self.__calculate_sign__(payload, timestamp)
-        headers = {
+        return {
             "APPID": self.app_id,
             "TIMESTAMP": timestamp,
             "SIGN": sign
         }
-        n = 1
+
+    def __request__(self, api_path, payload: dict, cache_key: str, use_cache: bool):
+        """
+        调用网关接口并写入缓存，失败时按重试策略重试
+        """
+        url = self.api_endpoint + api_path
+        started = time.monotonic()
+        attempt = 0
         while True:
+            attempt += 1
+            # 限速等待同样计入调用截止时间，剩余时间不够时不占用令牌
+            if self._rate_limiter is not None and not self._rate_limiter.acquire(api_path,
+                                                                                 timeout=deadline_remaining()):
+                raise create_exception(status_code=408, message=f"限速等待超过调用截止时间: {url}")
+            connect_timeout, read_timeout = self.__timeouts__(url)
+            self.retry_policy.record_attempt()
             try:
-                response = requests.post(url, headers=headers, json=payload)
-                break
+                # 每次尝试重新签名，避免长时间退避后时间戳过期
+                response = self._session.post(url, headers=self.__headers__(payload), json=payload,
+                                              timeout=(connect_timeout, read_timeout))
+                result = self.__handle_response__(api_path, response, cache_key, use_cache)
+            except requests.exceptions.Timeout as e:
+                error = create_exception(status_code=408, message=f"请求超时: {e}", request=e.request)
+                delay = self.__retry_delay__(url, attempt, started, error, 'timeout')
             except requests.exceptions.ConnectionError as e:
-                delay = n * 1
-                logging.error(e)
-                print(f"等待{delay}s 后再进行请求....")
-                time.sleep(delay)
+                delay = self.__retry_delay__(url, attempt, started, e, 'connection')
+            except EasyChainException as e:
+                if not self.retry_policy.is_retryable(e.error_code):
+                    raise
+                delay = self.__retry_delay__(url, attempt, started, e, str(e.error_code))
+            else:
+                self.retry_policy.record_success(attempt)
+                return result
+            time.sleep(delay)
 
+    def __timeouts__(self, url: str) -> Tuple[float, float]:
+        """
+        本次尝试的 (连接超时, 读取超时)，不超过调用截止时间的剩余时间；已超过截止时间时抛出 RequestTimeoutError
+        """
+        left = deadline_remaining()
+        if left is None:
+            return self.connect_timeout, self.read_timeout
+        if left <= 0:
+            raise create_exception(status_code=408, message=f"超过调用截止时间: {url}")
+        return min(self.connect_timeout, left), min(self.read_timeout, left)
+
+    def __retry_delay__(self, url: str, attempt: int, started: float, error: Exception, reason: str) -> float:
+        """
+        计算下一次重试前的等待时间；不再重试时重新抛出 error
+        """
+        headers = getattr(getattr(error, 'response', None), 'headers', None)
+        retry_after = parse_retry_after(headers.get('Retry-After')) if headers else None
+        left = deadline_remaining()
+        delay = self.retry_policy.next_delay(attempt, started, reason, retry_after, remaining=left)
+        if delay is None:
+            logging.error(f"(重试{attempt - 1}次后放弃) {url}: {reason}")
+            if left is not None and attempt < self.retry_policy.max_attempts:
+                # 还有重试次数，但剩余时间不够再尝试一次
+                raise create_exception(status_code=408, message=f"超过调用截止时间: {url}") from error
+            raise error
+        logging.warning(f"(第{attempt}次请求失败，{delay:.2f}s 后重试) {url}: {reason}")
+        return delay
+
+    def __handle_response__(self, api_path, response, cache_key: str, use_cache: bool):
+        """
+        解析响应并写入缓存
+        """
+        url = self.api_endpoint + api_path
+        try:
+            result = self.__parse_response__(response)
+        except NotFoundError as e:
+            # 业务上的“查无数据”也写入缓存（负缓存），重跑时直接重放同类异常，不再重复计费
+            if use_cache and self.negative_cache_expire_seconds > 0 and response.status_code == 200:
+                self._cache.set(cache_key, make_negative_entry(e.error_code, e.error_msg,
+                                                               self.negative_cache_expire_seconds))
+            raise
+
+        # 存入缓存
+        if use_cache:
+            self._cache.set(cache_key, result)
+        logging.info(f"(200:Ok!) {url}")
+        return result, False
+
+    def __schedule_refresh__(self, api_path, payload: dict, cache_key: str):
+        """
+        把陈旧缓存的刷新任务提交到后台线程池；同一缓存键同时只刷新一次，待刷新任务数有上限
+        """
+        with self._refresh_lock:
+            if cache_key in self._refreshing or len(self._refreshing) >= self.refresh_queue_size:
+                return
+            self._refreshing.add(cache_key)
+            if self._refresh_executor is None:
+                self._refresh_executor = ThreadPoolExecutor(max_workers=self.refresh_workers,
+                                                            thread_name_prefix="FDEasyChainRefresh")
+        self._refresh_executor.submit(self.__refresh__, api_path, payload, cache_key)
+
+    def __refresh__(self, api_path, payload: dict, cache_key: str):
+        try:
+            self.__fetch__(api_path, payload, cache_key, use_cache=True)
+        except (EasyChainException, requests.exceptions.RequestException) as e:
+            logging.warning(f"(缓存刷新失败) {api_path}: {e}")
+        except Exception:
+            # 其他异常（如响应不是JSON）同样不能让刷新悄无声息地失败
+            logging.exception(f"(缓存刷新异常) {api_path}")
+        finally:
+            with self._refresh_lock:
+                self._refreshing.discard(cache_key)
+
+    def __parse_response__(self, response):
+        """
+        解析网关响应，返回 data 字段；业务或HTTP错误时抛出对应的异常
+        """
         if response.status_code == 200:
-            resp_json = response.json()
+            if self.lazy_json:
+                # 只解析一遍，同时保留 data 字段的原始字节
+                resp_json, resp_raw = parse_envelope(response.content)
+            else:
+                resp_json = response.json()
             service_code = resp_json.get("code")
             if service_code == 200:
                 if "data" not in resp_json:
@@ -133,11 +542,9 @@ class EasyChainCli:
                         request=response.request,
                         response=response
                     )
-                
-                # 存入缓存
-                self._cache.set(cache_key, result)
-                logging.info(f"(200:Ok!) {url}")
-                return result, False
+                if self.lazy_json:
+                    return LazyJSON(resp_raw["data"], value=result)
+                return result
             else:
                 msg = resp_json.get("msg")
                 # 使用 create_exception 创建异常，传入完整的请求和响应信息
@@ -0,0 +1,43 @@
+# _*_ codign:utf8 _*_
+"""====================================
+@Author:Sadam·Sadik
+@Email：1903249375@qq.com
+@Date：2026/10/18
+@Software: PyCharm
+@disc: 调用截止时间
+======================================="""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+# 当前上下文的截止时间（time.monotonic()），线程和 asyncio 任务各自独立
+_DEADLINE: ContextVar[Optional[float]] = ContextVar('fdeasychain_deadline', default=None)
+
+
+@contextmanager
+def deadline(seconds: float):
+    """
+    限定代码块内所有接口调用的总耗时（包括限速等待、重试和退避），超时抛出 RequestTimeoutError
+    可以嵌套，内层截止时间不会晚于外层：
+
+        with deadline(10):
+            data, is_cached = cli.company_basic_query(key)
+
+    :param seconds: 从现在起允许的秒数
+    """
+    at = time.monotonic() + seconds
+    current = _DEADLINE.get()
+    token = _DEADLINE.set(at if current is None else min(at, current))
+    try:
+        yield
+    finally:
+        _DEADLINE.reset(token)
+
+
+def remaining() -> Optional[float]:
+    """
+    当前截止时间之前剩余的秒数（可能为负），没有设置截止时间时返回 None
+    """
+    at = _DEADLINE.get()
+    return None if at is None else at - time.monotonic()
@@ -161,11 +161,16 @@ class ServiceUnavailableError(EasyChainException):
     """503 服务暂时不可用错误"""
     pass
 
+class RequestTimeoutError(EasyChainException):
+    """408 请求超时（连接/读取超时，或超过调用截止时间）"""
+    pass
+
 # 错误码映射
 ERROR_MAPPINGS = {
     401: AuthenticationError,
     403: ForbiddenError,
     404: NotFoundError,
+    408: RequestTimeoutError,
     500: ServerError,
     503: ServiceUnavailableError
 }
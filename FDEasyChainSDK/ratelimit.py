@@ -0,0 +1,207 @@
+# _*_ codign:utf8 _*_
+"""====================================
+@Author:Sadam·Sadik
+@Email：1903249375@qq.com
+@Date：2026/10/18
+@Software: PyCharm
+@disc: 令牌桶限速（网关按 APPID 限制 QPS）
+======================================="""
+import asyncio
+import hashlib
+import logging
+import os
+import struct
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple, Union
+
+from FDEasyChainSDK.cache.keys import normalize_path
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+# 共享令牌桶的状态文件: 剩余令牌数(double) + 更新时间(double)
+_STATE = struct.Struct('<dd')
+
+
+class TokenBucket:
+    """
+    进程内令牌桶，线程安全
+    reserve() 立即预约一个令牌并返回需要等待的时间，调用方自行 sleep（线程）或 await asyncio.sleep（协程），
+    等待期间不持有锁；令牌不足时预约的发送时间依次排在后面，整体速率严格不超过 rate。
+    桶的状态是某一时刻的令牌数，该时刻可以在将来（已预约的最后一次发送时间）。
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        """
+        :param rate: 每秒产生的令牌数（QPS）
+        :param burst: 最多积累的令牌数，即允许的突发请求数；1 表示严格匀速
+        """
+        if rate <= 0:
+            raise ValueError(f"限速必须大于0: {rate}")
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, not_before: float = 0.0, max_wait: float = None) -> Optional[float]:
+        """
+        :param not_before: 最早的发送时间（距现在的秒数），同时受其他令牌桶限制时传入其他桶的等待时间，
+                           令牌在实际发送的时刻取得，不会占用更早的发送时间
+        :param max_wait: 最多等待的秒数，None 表示不限制
+        :return: 需要等待的秒数；需要等待 max_wait 或更久时不预约，返回 None
+        """
+        return self._update(lambda tokens, updated, now: self._take(tokens, updated, now, not_before, max_wait))
+
+    def refund(self):
+        """退还最近预约、但因其他限制没有使用的令牌"""
+        self._update(lambda tokens, updated, now: (None, (tokens + 1, updated)))
+
+    def _update(self, fn: Callable[[float, float, float], tuple]):
+        """
+        在锁内读-改-写桶的状态
+        :param fn: fn(令牌数, 状态时刻, 当前时刻) -> (返回值, 新的 (令牌数, 状态时刻) 或 None 表示不修改)
+        """
+        with self._lock:
+            result, state = fn(self._tokens, self._updated, time.monotonic())
+            if state is not None:
+                self._tokens, self._updated = state
+            return result
+
+    def _take(self, tokens: float, updated: float, now: float, not_before: float,
+              max_wait: Optional[float]) -> Tuple[Optional[float], Optional[Tuple[float, float]]]:
+        """
+        :return: (等待秒数, 发送时刻取得令牌后的 (余额, 发送时刻))
+        """
+        tokens = min(self.burst, tokens + (now - updated) * self.rate)
+        wait = max((1 - tokens) / self.rate, not_before, 0.0)
+        if max_wait is not None and wait >= max_wait:
+            return None, None
+        return wait, (min(self.burst, tokens + wait * self.rate) - 1, now + wait)
+
+
+class SharedTokenBucket(TokenBucket):
+    """
+    多进程共享的令牌桶，状态保存在本机文件中，每次预约在文件锁（flock）内读-改-写
+    同一台机器上的多个采集进程使用同一状态文件时，合计速率不超过 rate。不支持 fcntl 的平台上退化为进程内令牌桶。
+    """
+
+    def __init__(self, path: Union[str, Path], rate: float, burst: int = 1):
+        """
+        :param path: 状态文件路径
+        """
+        super().__init__(rate, burst)
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._fd = os.open(str(self.path), os.O_RDWR | os.O_CREAT, 0o644)
+        if fcntl is None:
+            logging.warning("当前平台不支持 fcntl，限速仅在进程内生效")
+
+    def _update(self, fn: Callable[[float, float, float], tuple]):
+        if fcntl is None:
+            return super()._update(fn)
+        with self._lock:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                # 进程之间需要共同的时钟，使用墙上时间
+                now = time.time()
+                data = os.pread(self._fd, _STATE.size, 0)
+                tokens, updated = _STATE.unpack(data) if len(data) == _STATE.size else (float(self.burst), now)
+                result, state = fn(tokens, updated, now)
+                if state is not None:
+                    os.pwrite(self._fd, _STATE.pack(*state), 0)
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+        return result
+
+    def close(self):
+        os.close(self._fd)
+
+
+class RateLimiter:
+    """
+    全局和按接口路径的限速，所有经过 __post__ 的网关请求（不包括缓存命中）在发送前取得令牌
+    同时配置了全局限速和某个接口的限速时，该接口的请求需要同时满足两者。
+    """
+
+    def __init__(self, rate: float = None, burst: int = 1,
+                 per_path: Dict[str, Union[float, Tuple[float, int]]] = None, shared_dir: Union[str, Path] = None):
+        """
+        :param rate: 所有接口合计的每秒请求数上限，None 表示不限制
+        :param burst: 全局允许的突发请求数，1 表示严格匀速
+        :param per_path: {接口路径: 每秒请求数上限} 或 {接口路径: (每秒请求数上限, 突发请求数)}，
+                         接口路径如 '/company_news_query/'，首尾斜杠可省略
+        :param shared_dir: 多进程共享限速的状态目录，同一台机器上使用同一目录的进程共享令牌桶；None 表示仅进程内限速
+        """
+        self.shared_dir = Path(shared_dir).expanduser() if shared_dir else None
+        self._global = self._bucket('global', rate, burst) if rate else None
+        self._per_path = {}
+        for path, limit in (per_path or {}).items():
+            path_rate, path_burst = limit if isinstance(limit, tuple) else (limit, 1)
+            path = normalize_path(path)
+            name = 'path-' + hashlib.md5(path.encode('utf-8')).hexdigest()
+            self._per_path[path] = self._bucket(name, path_rate, path_burst)
+        # 累计等待时间（秒），用于观察限速是否成为瓶颈
+        self.waited_seconds = 0.0
+        self._waited_lock = threading.Lock()
+
+    def _bucket(self, name: str, rate: float, burst: int) -> TokenBucket:
+        if self.shared_dir is None:
+            return TokenBucket(rate, burst)
+        return SharedTokenBucket(self.shared_dir / f"{name}.bucket", rate, burst)
+
+    def reserve(self, api_path: str, max_wait: float = None) -> Optional[float]:
+        """
+        预约一次请求
+        先预约接口的令牌，全局令牌预约在接口令牌可用之后，请求实际发送的时刻同时满足两者，不会浪费或重叠全局配额
+        :param max_wait: 最多等待的秒数，None 表示不限制
+        :return: 需要等待的秒数；需要等待 max_wait 或更久时不占用任何令牌，返回 None
+        """
+        bucket: Optional[TokenBucket] = self._per_path.get(normalize_path(api_path)) if self._per_path else None
+        delay = 0.0
+        if bucket is not None:
+            delay = bucket.reserve(max_wait=max_wait)
+            if delay is None:
+                return None
+        if self._global is not None:
+            global_delay = self._global.reserve(not_before=delay, max_wait=max_wait)
+            if global_delay is None:
+                if bucket is not None:
+                    bucket.refund()
+                return None
+            delay = global_delay
+        if delay > 0:
+            with self._waited_lock:
+                self.waited_seconds += delay
+        return delay
+
+    def acquire(self, api_path: str, timeout: float = None) -> bool:
+        """
+        阻塞当前线程直到可以发送请求
+        :param timeout: 最多等待的秒数，如调用截止时间的剩余时间；None 表示不限制
+        :return: 是否取得令牌；需要等待 timeout 或更久时不取得令牌，立即返回 False
+        """
+        delay = self.reserve(api_path, max_wait=timeout)
+        if delay is None:
+            return False
+        if delay > 0:
+            time.sleep(delay)
+        return True
+
+    async def acquire_async(self, api_path: str, timeout: float = None) -> bool:
+        """等待直到可以发送请求，不阻塞事件循环；参数和返回值同 acquire()"""
+        delay = self.reserve(api_path, max_wait=timeout)
+        if delay is None:
+            return False
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return True
+
+    def close(self):
+        for bucket in [self._global, *self._per_path.values()]:
+            if isinstance(bucket, SharedTokenBucket):
+                bucket.close()
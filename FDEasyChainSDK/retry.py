@@ -0,0 +1,133 @@
+# _*_ codign:utf8 _*_
+"""====================================
+@Author:Sadam·Sadik
+@Email：1903249375@qq.com
+@Date：2026/10/18
+@Software: PyCharm
+@disc: 请求重试策略
+======================================="""
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, Iterable, Optional
+
+# 默认重试的错误码：HTTP状态码和网关业务码（create_exception 的 error_code）
+DEFAULT_RETRY_CODES = (429, 500, 502, 503, 504)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    解析 Retry-After 响应头，支持秒数和HTTP日期两种格式
+    :return: 需要等待的秒数，无法解析时返回 None
+    """
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError, IndexError):
+        return None
+
+
+class RetryPolicy:
+    """
+    有上限的重试策略：指数退避 + 随机抖动，总耗时上限，可重试的错误码，遵循 Retry-After
+    连接错误总是可以重试；网关返回的错误（HTTP状态码或业务码）只有在 retry_codes 中时才重试，
+    如 500(ServerError)、503(ServiceUnavailableError)；404(查无数据)、401/403 等不会重试。
+    每次尝试、重试、放弃的次数按原因（'connection' 或错误码）统计，见 stats()。
+    """
+
+    def __init__(self, max_attempts: int = 5, backoff: float = 0.5, multiplier: float = 2.0,
+                 max_backoff: float = 30.0, jitter: bool = True, deadline: float = None,
+                 retry_codes: Iterable[int] = DEFAULT_RETRY_CODES, respect_retry_after: bool = True):
+        """
+        :param max_attempts: 最多尝试次数（包括第一次），1 表示不重试
+        :param backoff: 第一次重试前的等待时间（秒），之后每次乘以 multiplier
+        :param multiplier: 退避倍数
+        :param max_backoff: 单次等待时间上限（秒）
+        :param jitter: 是否在 [0, 退避时间] 内随机等待（full jitter），避免大量请求在故障恢复时同时重试
+        :param deadline: 所有尝试的总耗时上限（秒），None 表示只受 max_attempts 限制
+        :param retry_codes: 可以重试的错误码
+        :param respect_retry_after: 响应带有 Retry-After 时，等待时间不少于该值
+        """
+        if max_attempts < 1:
+            raise ValueError(f"max_attempts 至少为 1: {max_attempts}")
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.multiplier = multiplier
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.deadline = deadline
+        self.retry_codes = frozenset(retry_codes)
+        self.respect_retry_after = respect_retry_after
+        self._lock = threading.Lock()
+        self._stats = self._empty_stats()
+
+    @staticmethod
+    def _empty_stats() -> dict:
+        return {'attempts': 0, 'retries': 0, 'gave_up': 0, 'recovered': 0, 'sleep_seconds': 0.0, 'by_reason': {}}
+
+    def is_retryable(self, error_code) -> bool:
+        return error_code in self.retry_codes
+
+    def next_delay(self, attempt: int, started: float, reason: str, retry_after: float = None,
+                   remaining: float = None) -> Optional[float]:
+        """
+        第 attempt 次尝试失败后，计算下一次尝试前的等待时间
+        :param attempt: 已完成的尝试次数（从1开始）
+        :param started: 第一次尝试开始的时间（time.monotonic()）
+        :param reason: 失败原因，用于统计
+        :param retry_after: 响应中 Retry-After 指定的等待时间（秒）
+        :param remaining: 调用截止时间之前剩余的秒数，等待时间不足以再尝试一次时不再重试
+        :return: 等待秒数；不再重试时返回 None
+        """
+        delay = min(self.backoff * self.multiplier ** (attempt - 1), self.max_backoff)
+        if self.jitter:
+            delay = random.uniform(0, delay)
+        if self.respect_retry_after and retry_after is not None:
+            delay = max(delay, retry_after)
+        give_up = attempt >= self.max_attempts or (
+                self.deadline is not None and time.monotonic() - started + delay >= self.deadline) or (
+                remaining is not None and delay >= remaining)
+        with self._lock:
+            by_reason = self._stats['by_reason'].setdefault(reason, {'failures': 0, 'retries': 0, 'gave_up': 0})
+            by_reason['failures'] += 1
+            if give_up:
+                self._stats['gave_up'] += 1
+                by_reason['gave_up'] += 1
+                return None
+            self._stats['retries'] += 1
+            self._stats['sleep_seconds'] += delay
+            by_reason['retries'] += 1
+        return delay
+
+    def record_attempt(self):
+        """每次发送请求前调用"""
+        with self._lock:
+            self._stats['attempts'] += 1
+
+    def record_success(self, attempt: int):
+        """请求成功时调用，用于统计重试后成功的次数"""
+        if attempt > 1:
+            with self._lock:
+                self._stats['recovered'] += 1
+
+    def stats(self) -> Dict:
+        """
+        重试统计快照
+        :return: {'attempts': 发送次数, 'retries': 重试次数, 'gave_up': 放弃次数, 'recovered': 重试后成功次数,
+                  'sleep_seconds': 累计退避时间, 'by_reason': {原因: {'failures', 'retries', 'gave_up'}}}
+        """
+        with self._lock:
+            snapshot = dict(self._stats)
+            snapshot['by_reason'] = {reason: dict(counts) for reason, counts in self._stats['by_reason'].items()}
+            return snapshot
+
+    def reset_stats(self):
+        with self._lock:
+            self._stats = self._empty_stats()
@@ -0,0 +1,119 @@
+# _*_ codign:utf8 _*_
+"""====================================
+@Author:Sadam·Sadik
+@Email：1903249375@qq.com
+@Date：2026/10/18
+@Software: PyCharm
+@disc: 合并相同的并发请求（single-flight）
+======================================="""
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+from FDEasyChainSDK.deadline import remaining as deadline_remaining
+from FDEasyChainSDK.exceptions import RequestTimeoutError, create_exception
+
+
+class _Call:
+    __slots__ = ('done', 'result', 'error', 'bounded')
+
+    def __init__(self, bounded: bool):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        # 执行方是否在自己的调用截止时间内执行
+        self.bounded = bounded
+
+
+def _own_timeout(error: BaseException, bounded: bool) -> bool:
+    """执行方因为它自己的调用截止时间而超时：这个异常不属于等待方，等待方应当按自己的截止时间重新执行"""
+    return bounded and isinstance(error, RequestTimeoutError)
+
+
+class SingleFlight:
+    """
+    同一个键同时只执行一次：第一个调用方执行，执行期间到达的相同调用等待并共享其结果（或异常）
+    执行结束后立即移除，之后的调用重新执行（此时通常已经可以命中缓存）。
+    执行方超过它自己的调用截止时间时，等待方不共享这个超时异常，而是重新执行（其中一个成为新的执行方）。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _Call] = {}
+        # 被合并（未实际执行）的调用次数
+        self.coalesced = 0
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        while True:
+            with self._lock:
+                call = self._calls.get(key)
+                leader = call is None
+                if leader:
+                    call = self._calls[key] = _Call(deadline_remaining() is not None)
+                else:
+                    self.coalesced += 1
+            if leader:
+                break
+            # 等待时同样遵守调用截止时间
+            if not call.done.wait(deadline_remaining()):
+                raise create_exception(status_code=408, message=f"等待相同请求的结果时超过调用截止时间: {key}")
+            if call.error is None:
+                return call.result
+            if not _own_timeout(call.error, call.bounded):
+                raise call.error
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+
+class AsyncSingleFlight:
+    """
+    SingleFlight 的 asyncio 版本，只在一个事件循环中使用
+    执行的协程被取消、或执行方超过它自己的调用截止时间时，等待中的调用方各自重新执行，不会因此被取消或超时。
+    """
+
+    def __init__(self):
+        # key -> (结果 future, 执行方是否有调用截止时间)
+        self._calls: Dict[str, Tuple[asyncio.Future, bool]] = {}
+        self.coalesced = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        while key in self._calls:
+            future, bounded = self._calls[key]
+            self.coalesced += 1
+            try:
+                # shield: 等待方被取消或超时时不影响正在执行的请求
+                return await asyncio.wait_for(asyncio.shield(future), deadline_remaining())
+            except asyncio.TimeoutError:
+                raise create_exception(status_code=408,
+                                       message=f"等待相同请求的结果时超过调用截止时间: {key}") from None
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise
+            except RequestTimeoutError as e:
+                if not _own_timeout(e, bounded):
+                    raise
+        future = asyncio.get_running_loop().create_future()
+        self._calls[key] = (future, deadline_remaining() is not None)
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # 没有等待方时避免 “exception was never retrieved” 警告
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self._calls[key]